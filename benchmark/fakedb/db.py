@@ -0,0 +1,62 @@
+'''
+#
+# db.py (benchmark)
+#
+# An in-memory stand-in for the lib_py_postgres db module, used by goloadbench.py
+# so that goload can be timed without a database
+#
+# to call from goloadbench.py:
+#	sys.path.insert(0, benchmark/fakedb)	(before goload imports db)
+#	import db
+#	db.setResults(fixtures.Fixtures(rows).dbResults())
+#
+# What it will do:
+#	sql() returns a copy of the rows of the first result whose query text
+#	is found in the command (whitespace is ignored), else []
+#	nothing is written; bcp()/commit() only count the calls
+#
+'''
+
+results = []
+counts = {'sql' : 0, 'bcp' : 0, 'commit' : 0}
+
+def setResults(newResults):
+
+    global results
+
+    results = [(' '.join(text.split()), rows) for text, rows in newResults]
+
+def sql(cmd, parser='auto', **kwargs):
+
+    counts['sql'] += 1
+
+    if isinstance(cmd, list):
+        return [sql(c, parser) for c in cmd]
+
+    cmd = ' '.join(cmd.split())
+    for text, rows in results:
+        if text in cmd:
+            return [dict(r) for r in rows]
+
+    return []
+
+def bcp(*args, **kwargs):
+
+    counts['bcp'] += 1
+
+def commit():
+
+    counts['commit'] += 1
+
+def setTrace(*args):
+    pass
+
+def useOneConnection(*args):
+    pass
+
+def setAutoTranslate(*args):
+    pass
+
+def setAutoTranslateBE(*args):
+    pass
+
@@ -0,0 +1,442 @@
+'''
+#
+# fixtures.py
+#
+# Writes synthetic goload input files, and the matching database lookups
+# for the in-memory db module (benchmark/fakedb/db.py)
+#
+# Output:
+#
+# <dir>/MOUSE-mod.gpad.gz : GPAD 2.0, <rows> rows
+# <dir>/mgi.gpi            : GPI 2.0, the markers and their PR/EMBL/ENSEMBL/RefSeq isoforms
+# <dir>/raw.githubusercontent.com/.../gaf-eco-mapping-derived.txt (<dir> is ${DATADOWNLOADS}, see ecolib.py)
+# <dir>/uberon.obo
+# <dir>/goload.refs        : the distinct references of the GPAD, as gpadscan.py writes
+#                            ${INFILE_NAME_REFS} (MGI:xxxx, pubmed id without PMID:)
+#
+# the number of markers, references, uberon terms, etc. grow with <rows>
+# (about the same proportions as the MGI GPAD); the same seed gives the same files
+#
+# to call from goloadbench.py:
+#	f = fixtures.Fixtures(rows)
+#	f.writeFiles(dir)
+#	fakedb.setResults(f.dbResults())
+#
+# to call from command line:
+#	fixtures.py dir rows [seed]
+#
+'''
+
+import sys
+import os
+import gzip
+import random
+
+# the ECO file, relative to ${DATADOWNLOADS}
+ECO_PATH = 'raw.githubusercontent.com/evidenceontology/evidenceontology/master/gaf-eco-mapping-derived.txt'
+
+# GO evidence code -> ECO ids; the first ECO id is the default
+EVIDENCE = [
+        ('IDA', ['ECO:0000314', 'ECO:0001225']),
+        ('IMP', ['ECO:0000315', 'ECO:0001230']),
+        ('IGI', ['ECO:0000316', 'ECO:0005790']),
+        ('IPI', ['ECO:0000353', 'ECO:0000021']),
+        ('ISS', ['ECO:0000250', 'ECO:0000255']),
+        ('ISO', ['ECO:0000266', 'ECO:0000265']),
+        ('ISA', ['ECO:0000247']),
+        ('ISM', ['ECO:0000255']),
+        ('IBA', ['ECO:0000318']),
+        ('IC', ['ECO:0000305']),
+        ('TAS', ['ECO:0000304']),
+        ('NAS', ['ECO:0000303']),
+        ('ND', ['ECO:0000307']),
+        ('IEA', ['ECO:0000501', 'ECO:0007669', 'ECO:0000256']),
+        ('HDA', ['ECO:0007005']),
+        ('HMP', ['ECO:0007001']),
+        ('HGI', ['ECO:0007003']),
+        ('HEP', ['ECO:0007007']),
+        ('EXP', ['ECO:0000269']),
+        ('IEP', ['ECO:0000270']),
+        ('IKR', ['ECO:0000320']),
+        ('IGC', ['ECO:0000317']),
+        ('RCA', ['ECO:0000245']),
+        ]
+
+# RO/BFO id -> GO property (VOC_Term, _vocab_key = 82)
+RELATIONS = [
+        ('RO:0002327', 'enables'),
+        ('RO:0002331', 'involved_in'),
+        ('RO:0002432', 'is_active_in'),
+        ('BFO:0000050', 'part_of'),
+        ('BFO:0000066', 'occurs_in'),
+        ('RO:0002325', 'colocalizes_with'),
+        ('RO:0002326', 'contributes_to'),
+        ('RO:0002205', 'has_input'),
+        ('RO:0002233', 'has_input'),
+        ('RO:0002333', 'acts_upstream_of'),
+        ('RO:0002263', 'acts_upstream_of_negative_effect'),
+        ('RO:0002264', 'acts_upstream_of_positive_effect'),
+        ('RO:0002211', 'regulates'),
+        ('RO:0002212', 'negatively_regulates'),
+        ('RO:0002213', 'positively_regulates'),
+        ('RO:0001025', 'located_in'),
+        ('RO:0002092', 'happens_during'),
+        ('RO:0004009', 'has_primary_input'),
+        ]
+
+# column 3 (Relation) values
+QUALIFIERS = ['RO:0002327', 'RO:0002331', 'RO:0002432', 'BFO:0000050', 'RO:0001025',
+        'RO:0002325', 'RO:0002326', 'RO:0002263', 'RO:0002264']
+
+# column 10 (Assigned_By) values
+ASSIGNEDBY = ['MGI', 'GO_Central', 'UniProt', 'GOC', 'SynGO', 'ComplexPortal', 'ARUK-UCL',
+        'Reactome', 'RHEA', 'ParkinsonsUK-UCL', 'BHF-UCL', 'IntAct', 'CACAO', 'SynGO-UCL']
+
+class Fixtures:
+    '''
+    the synthetic data set for <rows> GPAD rows
+    '''
+
+    def __init__(self, rows, seed=1):
+
+        self.rows = rows
+        self.seed = seed
+        self.markers = max(rows // 25, 10)
+        self.isoforms = max(rows // 100, 10)
+        self.refs = max(rows // 15, 10)
+        self.goRefs = 50
+        self.goTerms = max(rows // 40, 10)
+        self.uberonTerms = min(max(rows // 50, 100), 15000)
+        self.emapaTerms = self.uberonTerms * 2
+
+    def markerID(self, i):
+        return 'MGI:MGI:%d' % (100000 + i)
+
+    def isoformID(self, i):
+        prefix = ['PR', 'PR', 'PR', 'EMBL', 'ENSEMBL', 'RefSeq'][i % 6]
+        return '%s:Q%06d-%d' % (prefix, i, i % 4 + 1)
+
+    def uberonID(self, i):
+        return 'UBERON:%07d' % (i + 1)
+
+    def emapaID(self, i):
+        return 'EMAPA:%d' % (16000 + i)
+
+    #
+    # Purpose: write all of the input files to fixtureDir
+    #
+    def writeFiles(self, fixtureDir):
+
+        os.makedirs(fixtureDir, exist_ok=True)
+        self.writeGPAD(os.path.join(fixtureDir, 'MOUSE-mod.gpad.gz'))
+        self.writeGPI(os.path.join(fixtureDir, 'mgi.gpi'))
+        os.makedirs(os.path.dirname(os.path.join(fixtureDir, ECO_PATH)), exist_ok=True)
+        self.writeECO(os.path.join(fixtureDir, ECO_PATH))
+        self.writeUberon(os.path.join(fixtureDir, 'uberon.obo'))
+        self.writeRefs(os.path.join(fixtureDir, 'goload.refs'))
+
+    #
+    # Purpose: return a random Annotation_Extensions value (column 11)
+    #
+    def extension(self, r):
+
+        n = r.random()
+        if n < 0.75:
+            return ''
+
+        groups = []
+        for g in range(r.choice([1, 1, 1, 2])):
+            parts = []
+            for p in range(r.choice([1, 1, 2, 3])):
+                kind = r.random()
+                if kind < 0.35:
+                    filler = self.uberonID(r.randrange(self.uberonTerms + 5))
+                    relation = 'BFO:0000066'
+                elif kind < 0.55:
+                    filler = 'CL:%07d' % r.randrange(1000)
+                    relation = 'BFO:0000066'
+                elif kind < 0.75:
+                    filler = self.markerID(r.randrange(self.markers))
+                    relation = r.choice(['RO:0002205', 'RO:0002233', 'RO:0004009'])
+                elif kind < 0.9:
+                    filler = 'GO:%07d' % r.randrange(self.goTerms)
+                    relation = r.choice(['BFO:0000050', 'RO:0002211', 'RO:0002092'])
+                elif kind < 0.98:
+                    filler = 'UniProtKB:P%05d' % r.randrange(20000)
+                    relation = 'RO:0002233'
+                else:
+                    # unknown relation
+                    filler = 'GO:%07d' % r.randrange(self.goTerms)
+                    relation = 'RO:9999999'
+                parts.append('%s(%s)' % (relation, filler))
+            groups.append(','.join(parts))
+
+        return '|'.join(groups)
+
+    #
+    # Purpose: return a random Annotation_Properties value (column 12)
+    #
+    def properties(self, r):
+
+        props = []
+        if r.random() < 0.6:
+            props.append('noctua-model-id=gomodel:%016x' % r.randrange(1 << 60))
+            props.append('model-state=production')
+        if r.random() < 0.7:
+            orcids = ['https://orcid.org/0000-000%d-%04d-%04d' % (r.randrange(4), r.randrange(10000), r.randrange(10000))
+                    for i in range(r.choice([1, 1, 2]))]
+            props.append('contributor-id=' + '|'.join(orcids))
+        if r.random() < 0.2:
+            props.append('comment="%s"' % r.choice(['see figure 2', 'inferred from mutant phenotype', 'x=y']))
+        return '|'.join(props)
+
+    #
+    # Purpose: write the GPAD file
+    #
+    def writeGPAD(self, fileName):
+
+        r = random.Random(self.seed)
+        ecoIDs = [e for evidence, ecos in EVIDENCE for e in ecos]
+
+        # the distinct references, for writeRefs()
+        self.refIDs = set()
+
+        gpadFile = gzip.open(fileName, 'wt')
+        gpadFile.write('!gpa-version: 2.0\n!generated-by: goload benchmark\n')
+
+        for i in range(self.rows):
+
+            n = r.random()
+            if n < 0.9:
+                objectID = self.markerID(r.randrange(self.markers))
+            elif n < 0.998:
+                objectID = self.isoformID(r.randrange(self.isoforms))
+            else:
+                # not in the gpi file
+                objectID = 'PR:X%06d' % r.randrange(1000)
+
+            n = r.random()
+            if n < 0.8:
+                references = 'PMID:%d' % (10000000 + r.randrange(self.refs + self.refs // 50))
+            elif n < 0.9:
+                references = 'GO_REF:%07d' % r.randrange(self.goRefs)
+            elif n < 0.97:
+                references = 'MGI:MGI:%d' % (5000000 + r.randrange(self.refs // 5))
+            elif n < 0.99:
+                references = 'PMID:%d|GO_REF:%07d' % (10000000 + r.randrange(self.refs), r.randrange(self.goRefs))
+            else:
+                references = 'Reactome:R-MMU-%d' % r.randrange(100000)
+
+            # the same translation as gpadscan.py
+            for ref in references.replace('MGI:MGI:', 'MGI:').replace('PMID:', '').split('|'):
+                if not ref.startswith('GO_REF:'):
+                    self.refIDs.add(ref)
+
+            n = r.random()
+            if n < 0.5:
+                withFrom = ''
+            elif n < 0.8:
+                withFrom = ','.join([self.markerID(r.randrange(self.markers)) for j in range(r.choice([1, 1, 2, 3]))])
+            elif n < 0.95:
+                withFrom = '|'.join([r.choice(['UniProtKB', 'UniprotKB', 'UniProtKb']) + ':P%05d' % r.randrange(20000)
+                        for j in range(r.choice([1, 2]))])
+            else:
+                withFrom = r.choice(['InterPro:IPR%06d', 'PANTHER:PTN%09d', 'EMBL:AB%06d', 'Ensembl:ENSMUSG%011d']) % r.randrange(100000)
+
+            row = [
+                objectID,
+                'NOT' if r.random() < 0.02 else '',
+                r.choice(QUALIFIERS),
+                'GO:%07d' % r.randrange(self.goTerms),
+                references,
+                r.choice(ecoIDs) if r.random() < 0.999 else 'ECO:9999999',
+                withFrom,
+                'NCBITaxon:10090' if r.random() < 0.01 else '',
+                '20%02d%02d%02d' % (r.randrange(5, 25), r.randrange(1, 13), r.randrange(1, 29)),
+                r.choice(ASSIGNEDBY),
+                self.extension(r),
+                self.properties(r),
+                ]
+            gpadFile.write('\t'.join(row) + '\n')
+
+        gpadFile.close()
+
+    #
+    # Purpose: write the distinct references of the GPAD (see writeGPAD())
+    #
+    def writeRefs(self, fileName):
+
+        refsFile = open(fileName, 'w')
+        for ref in sorted(self.refIDs):
+            refsFile.write(ref + '\n')
+        refsFile.close()
+
+    #
+    # Purpose: write the GPI file
+    #
+    def writeGPI(self, fileName):
+
+        r = random.Random(self.seed + 1)
+        gpiFile = open(fileName, 'w')
+        gpiFile.write('!gpi-version: 2.0\n')
+
+        for i in range(self.markers):
+            gpiFile.write('\t'.join([self.markerID(i), 'Gene%d' % i, 'gene %d' % i, '', 'SO:0000704',
+                    'NCBITaxon:10090', '', '', '', '']) + '\n')
+
+        for i in range(self.isoforms):
+            gpiFile.write('\t'.join([self.isoformID(i), 'Gene%d' % i, 'isoform %d' % i, '', 'PR:000000001',
+                    'NCBITaxon:10090', self.markerID(r.randrange(self.markers)), '', '', '']) + '\n')
+
+        gpiFile.close()
+
+    #
+    # Purpose: write the ECO -> GO evidence mapping file
+    #
+    def writeECO(self, fileName):
+
+        ecoFile = open(fileName, 'w')
+        ecoFile.write('# ECO-term\tGO-code\tDefault\n')
+        for evidence, ecos in EVIDENCE:
+            for i, eco in enumerate(ecos):
+                if i == 0:
+                    ecoFile.write('%s\t%s\tDefault\n' % (eco, evidence))
+                else:
+                    ecoFile.write('%s\t%s\n' % (eco, evidence))
+        ecoFile.close()
+
+    #
+    # Purpose: write the uberon.obo file
+    #	some terms are obsolete, some have no EMAPA or > 1 EMAPA xref
+    #
+    def writeUberon(self, fileName):
+
+        r = random.Random(self.seed + 2)
+        oboFile = open(fileName, 'w')
+        oboFile.write('format-version: 1.2\nontology: uberon\n\n')
+
+        for i in range(self.uberonTerms):
+            oboFile.write('[Term]\nid: %s\nname: structure %d\n' % (self.uberonID(i), i))
+            oboFile.write('def: "a synthetic anatomical structure" []\n')
+            if i % 50 == 0:
+                oboFile.write('is_obsolete: true\n')
+            oboFile.write('xref: FMA:%d\n' % (i + 7000))
+            n = r.random()
+            if n < 0.7:
+                oboFile.write('xref: %s {source="MA"}\n' % self.emapaID(i))
+            if n < 0.1:
+                oboFile.write('xref: %s\n' % self.emapaID(self.uberonTerms + i))
+            oboFile.write('is_a: %s ! parent\n\n' % self.uberonID(i // 2))
+
+        oboFile.write('[Typedef]\nid: part_of\nname: part of\nxref: BFO:0000050\n')
+        oboFile.close()
+
+    #
+    # Purpose: return the results of the goload/display queries
+    #	a list of (query text, rows); see fakedb.setResults()
+    #
+    def dbResults(self):
+
+        r = random.Random(self.seed + 3)
+
+        refs = []
+        for i in range(self.refs):
+            refs.append({'mgiID' : 'MGI:%d' % (5000000 + i),
+                         'pubmedID' : str(10000000 + i) if i % 10 else '',
+                         'jnumID' : 'J:%d' % (100000 + i)})
+
+        goRefs = [{'goref' : 'GO_REF:%07d' % i, 'jnum' : 'J:%d' % (70000 + i)} for i in range(self.goRefs)]
+
+        ro = [{'note' : note, 'term' : term} for note, term in RELATIONS]
+
+        users = [{'login' : 'GO_' + a} for a in ASSIGNEDBY if r.random() < 0.8]
+
+        emapa = [{'accID' : self.emapaID(i)} for i in range(self.emapaTerms)]
+
+        providers = [
+            {'name' : 'Cell Ontology', 'url' : 'https://www.ebi.ac.uk/ols/ontologies/cl/terms?obo_id=@@@@'},
+            {'name' : 'Ensembl Gene Model', 'url' : 'https://www.ensembl.org/Mus_musculus/geneview?gene=@@@@'},
+            {'name' : 'UniProt', 'url' : 'https://www.uniprot.org/uniprot/@@@@'},
+            {'name' : 'EMBL', 'url' : 'https://www.ebi.ac.uk/ena/browser/view/@@@@'},
+            {'name' : 'RefSeq', 'url' : 'https://www.ncbi.nlm.nih.gov/entrez/viewer.cgi?val=@@@@'},
+            ]
+
+        return [
+            ('from BIB_Citation_Cache where jnumID is not null', refs),
+            # goload.py/queryGPADRefs() : the references in ${INFILE_NAME_REFS}
+            ('from goRefIDs r, BIB_Citation_Cache c', refs),
+            ('a1._LogicalDB_key = 185', goRefs),
+            ('t._vocab_key = 82', ro),
+            ('from MGI_User where login like', users),
+            ('t._Vocab_key = 90', emapa),
+            ('from acc_logicaldb ldb', providers),
+            ]
+
+    #
+    # Purpose: return the rows of the go_annot_extensions_display query
+    #	(accid, term, _evidenceproperty_key, value), sorted by value
+    #
+    def extensionProperties(self):
+
+        r = random.Random(self.seed + 4)
+        properties = []
+
+        for key in range(self.rows // 4):
+            n = r.random()
+            if n < 0.3:
+                value = 'GO:%07d' % r.randrange(self.goTerms)
+                accid, term = value, 'go term %s' % value[3:]
+            elif n < 0.45:
+                value = self.emapaID(r.randrange(self.emapaTerms))
+                accid, term = value, 'emapa term %s' % value[6:]
+            elif n < 0.6:
+                value = self.markerID(r.randrange(self.markers))[4:]
+                accid, term = value, 'Gene%s' % value[4:]
+            elif n < 0.7:
+                value = 'CL:%07d' % r.randrange(1000)
+                accid, term = value, 'cell %s' % value[3:]
+            elif n < 0.8:
+                value = 'UniProtKB:P%05d' % r.randrange(20000)
+                accid, term = None, None
+            elif n < 0.9:
+                value = 'PR:%09d' % r.randrange(20000)
+                accid, term = None, None
+            else:
+                value = 'ENSEMBL:ENSMUSG%011d' % r.randrange(100000)
+                accid, term = None, None
+            properties.append({'accid' : accid, 'term' : term, '_evidenceproperty_key' : key + 1, 'value' : value})
+
+        properties.sort(key=lambda p: p['value'])
+        return properties
+
+    #
+    # Purpose: return the rows of the go_isoforms_display query
+    #	(_evidenceproperty_key, [values])
+    #
+    def isoformProperties(self):
+
+        r = random.Random(self.seed + 5)
+        properties = []
+
+        for key in range(self.rows // 10):
+            values = []
+            for i in range(r.choice([1, 1, 1, 2])):
+                values.append(r.choice(['PR:', 'UniProtKB:', 'EMBL:', 'RefSeq:', 'NCBI:']) + 'Q%06d' % r.randrange(20000))
+            properties.append({'_evidenceproperty_key' : key + 1, 'value' : values})
+
+        return properties
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 3:
+        print('usage: fixtures.py dir rows [seed]')
+        sys.exit(1)
+
+    if len(sys.argv) > 3:
+        seed = int(sys.argv[3])
+    else:
+        seed = 1
+
+    Fixtures(int(sys.argv[2]), seed).writeFiles(sys.argv[1])
+    sys.exit(0)
+
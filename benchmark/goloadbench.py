@@ -0,0 +1,155 @@
+'''
+#
+# goloadbench.py
+#
+# Times the goload hot paths on synthetic input, without a database
+#
+#	initialize()            goload.py : lookups (gpi, eco, uberon, refs, ...)
+#	readGPAD()              goload.py : translate the GPAD to goload.annot
+#	processECO()            ecolib.py
+#	processUberon()         uberonlib.py
+#	convertExtensions()     uberonlib.py, on the GPAD Annotation_Extensions column
+#	translateExtensions()   extensionlib.py, on the GPAD Annotation_Extensions column
+#	transformProperties()   go_annot_extensions_display.py, go_isoforms_display.py
+#	                        (skipped if mgi_utils/go_annot_extensions/go_isoforms are not installed)
+#	                        the renderLink() cache hit rate is printed (see lib/memolib.py)
+#
+# Input:
+#
+# the synthetic files written by fixtures.py to <dir> (written if they do not exist)
+# the database is replaced by benchmark/fakedb/db.py
+#
+# Output:
+#
+# the run statistics of each phase (see lib/runstats.py) are printed, written to
+# <dir>/goloadbench.stats.json and appended to ${RUNSTATS_HISTORY}
+# (default <dir>/goloadbench.stats.csv), so that runs can be compared
+#
+# Usage:
+#	goloadbench.py [rows [dir [seed]]]
+#
+#	rows : number of GPAD rows (default 100000)
+#	dir  : fixture/output directory (default /tmp/goloadbench)
+#
+#	${GOLOAD_WORKERS} is used by readGPAD() as in goload.py
+#
+'''
+
+import sys
+import os
+import time
+
+benchmarkDir = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault('GOLOAD', os.path.dirname(benchmarkDir))
+
+# the in-memory db must be found before the real one
+sys.path.insert(0, os.environ['GOLOAD'] + '/bin')
+sys.path.insert(0, os.environ['GOLOAD'] + '/lib')
+sys.path.insert(0, benchmarkDir + '/fakedb')
+sys.path.insert(0, benchmarkDir)
+import db
+import fixtures
+
+if len(sys.argv) > 1:
+    rows = int(sys.argv[1])
+else:
+    rows = 100000
+
+if len(sys.argv) > 2:
+    benchDir = sys.argv[2]
+else:
+    benchDir = '/tmp/goloadbench'
+
+if len(sys.argv) > 3:
+    seed = int(sys.argv[3])
+else:
+    seed = 1
+
+fixtureDir = os.path.join(benchDir, 'fixtures.%d.%d' % (rows, seed))
+outputDir = os.path.join(benchDir, 'output')
+os.makedirs(outputDir, exist_ok=True)
+
+os.environ['FROM_MGIINFILE_NAME_GZ'] = fixtureDir + '/MOUSE-mod.gpad.gz'
+os.environ['GPIFILE'] = fixtureDir + '/mgi.gpi'
+os.environ['DATADOWNLOADS'] = fixtureDir
+os.environ['ECOFILE'] = fixtureDir + '/' + fixtures.ECO_PATH
+os.environ['UBERONFILE'] = fixtureDir + '/uberon.obo'
+os.environ['UBERONTEXTFILE'] = outputDir + '/uberon.txt'
+os.environ['INFILE_NAME'] = outputDir + '/goload.annot'
+os.environ['INFILE_NAME_ERROR'] = outputDir + '/goload.error'
+os.environ['PUBMED_ERROR'] = outputDir + '/pubmed.error'
+# only the references cited in the GPAD are read (goload.py/queryGPADRefs())
+os.environ['INFILE_NAME_REFS'] = fixtureDir + '/goload.refs'
+os.environ['OUTPUTDIR'] = outputDir
+os.environ['LOGDIR'] = benchDir
+os.environ.setdefault('RUNSTATS_HISTORY', benchDir + '/goloadbench.stats.csv')
+
+# always build the lookups
+os.environ['LOOKUPCACHEDIR'] = ''
+
+fixture = fixtures.Fixtures(rows, seed)
+
+# (goload.refs was added later; older fixture directories are re-written)
+if not os.path.exists(fixtureDir + '/done') or not os.path.exists(fixtureDir + '/goload.refs'):
+    print('writing fixtures: ', fixtureDir)
+    startTime = time.time()
+    fixture.writeFiles(fixtureDir)
+    open(fixtureDir + '/done', 'w').close()
+    print('fixtures: %.1f sec' % (time.time() - startTime))
+
+db.setResults(fixture.dbResults())
+
+import runstats
+import ecolib
+import uberonlib
+import extensionlib
+import goload
+
+runstats.start('goloadbench')
+print('rows: %d, workers: %d' % (rows, goload.workers))
+
+with runstats.phase('initialize'):
+    goload.initialize()
+
+with runstats.phase('readGPAD'):
+    goload.readGPAD(goload.gpadInFile)
+    goload.closeFiles()
+
+with runstats.phase('processECO'):
+    ecolib.processECO()
+
+with runstats.phase('processUberon'):
+    uberonLookup = uberonlib.processUberon()
+
+# the Annotation_Extensions column, as goload.translateGPAD() passes it
+gpadInFile = goload.gpadlib.openGPAD(os.environ['FROM_MGIINFILE_NAME_GZ'])
+extensions = [r.extensions.replace('MGI:MGI:', 'MGI:') for r in goload.gpadlib.readGPAD(gpadInFile) if r.extensions != '']
+gpadInFile.close()
+
+with runstats.phase('convertExtensions'):
+    for e in extensions:
+        uberonlib.convertExtensions(e, uberonLookup)
+    runstats.addRows(read=len(extensions))
+
+with runstats.phase('translateExtensions'):
+    for e in extensions:
+        extensionlib.translateExtensions(e, goload.roLookup, uberonLookup)
+    runstats.addRows(read=len(extensions))
+
+for name, properties in (('go_annot_extensions_display', fixture.extensionProperties()),
+                         ('go_isoforms_display', fixture.isoformProperties())):
+    try:
+        display = __import__(name)
+    except ImportError as e:
+        print('%s skipped: %s' % (name, e))
+        continue
+
+    providerLinkMap = display.queryProviderLinkMap()
+    render = display.linklib.memoRenderLink(display.linklib.buildLinks(display.LINK_RULES, providerLinkMap))
+    with runstats.phase(name + '.transformProperties'):
+        display.transformProperties(properties, providerLinkMap, render)
+        runstats.addRows(read=len(properties))
+    render.report()
+
+print('db calls: ', db.counts)
+
@@ -0,0 +1,97 @@
+'''
+#
+# uberonbench.py
+#
+# Compares the time to build the UBERON -> EMAPA lookup
+# using the original line-based reader with a list of primary EMAPA ids
+# and uberonlib.readUberon() (obo stanza reader with a set of primary EMAPA ids)
+#
+# Input:
+#
+# ${UBERONFILE} : the uberon.obo file (or the file given on the command line)
+#
+# Usage:
+#	uberonbench.py [uberon.obo]
+#
+# the primary EMAPA ids are read from the database (uberonlib.queryPrimaryEmapa())
+#
+'''
+
+import sys
+import os
+import time
+
+goloadpath = os.environ['GOLOAD'] + '/lib'
+sys.path.insert(0, goloadpath)
+import uberonlib
+
+#
+# Purpose: the original processUberon() reader, kept for comparison
+#
+def readUberonOriginal(uberonFile, primaryEmapa):
+
+    lookup = {}
+    uberonIdValue = 'id: UBERON:'
+    emapaXrefValue = 'xref: EMAPA:'
+    foundUberon = 0
+
+    for line in uberonFile.readlines():
+
+        if line == '[Term]':
+            foundUberon = 0
+
+        elif line[:11] == uberonIdValue:
+            uberonId = line[4:-1]
+            foundUberon = 1
+
+        elif foundUberon and line[:12] == emapaXrefValue:
+
+            emapaId = line[6:-1]
+
+            if emapaId not in primaryEmapa:
+                continue
+
+            if uberonId not in lookup:
+                lookup[uberonId] = []
+            lookup[uberonId].append(emapaId)
+
+    return lookup
+
+#
+# Purpose: time one build of the lookup
+#
+def timeBuild(name, readFunction, uberonFileName, primaryEmapa):
+
+    uberonFile = open(uberonFileName, 'r')
+    startTime = time.perf_counter()
+    lookup = readFunction(uberonFile, primaryEmapa)
+    elapsed = time.perf_counter() - startTime
+    uberonFile.close()
+
+    print('%-10s %10.3f sec %8d uberon ids' % (name, elapsed, len(lookup)))
+
+    return lookup
+
+#
+# main
+#
+
+if len(sys.argv) > 1:
+    uberonFileName = sys.argv[1]
+else:
+    uberonFileName = os.environ['UBERONFILE']
+
+primaryEmapaSet = uberonlib.queryPrimaryEmapa()
+primaryEmapaList = list(primaryEmapaSet)
+print('uberon file: ', uberonFileName)
+print('primary emapa ids: ', len(primaryEmapaSet))
+
+original = timeBuild('original', readUberonOriginal, uberonFileName, primaryEmapaList)
+new = timeBuild('new', uberonlib.readUberon, uberonFileName, primaryEmapaSet)
+
+# the differences are expected: obsolete terms and [Typedef] stanzas are no longer mapped
+added = set(new) - set(original)
+removed = set(original) - set(new)
+print('uberon ids only in new: ', len(added))
+print('uberon ids only in original: ', len(removed))
+
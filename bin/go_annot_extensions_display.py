@@ -13,12 +13,19 @@ Load the cache of notes representing the display values for GO annotation extens
 """
 
 from optparse import OptionParser
+import sys
 import os
-import re
 import db
 import mgi_utils
 import go_annot_extensions
 
+goloadpath = os.environ['GOLOAD'] + '/lib'
+sys.path.insert(0, goloadpath)
+import runstats
+import notecachelib
+import linklib
+import memolib
+
 db.setTrace()
 
 USAGE="""
@@ -27,11 +34,8 @@ usage: %prog [-S -D -U -P]
 
 ### Constants ###
 
-OUT_DIR = os.environ['OUTPUTDIR']
-COLDL = '\t'
-LINEDL = '\n'
-
-NOTE_BCP_FILE = OUT_DIR + "/MGI_Note.go_annot_extensions.bcp"
+# number of properties read from the cursor at a time
+FETCH_SIZE = 50000
 
 # note type for annotation extension display/link
 DISPLAY_NOTE_TYPE_KEY = 1045
@@ -56,6 +60,24 @@ DATABASE_PROVIDERS = [
     ('SWISS-PROT', 'UniProt')
 ]
 
+# id prefix -> link (see lib/linklib.py)
+LINK_RULES = [
+    # link GO ID to GO term detail
+    ('GO', linklib.DETAIL, 'GO'),
+    # link EMAPA ID to EMAPA term detail
+    ('EMAPA', linklib.DETAIL, 'EMAPA'),
+    # link form of ID has an underscore
+    ('CL', linklib.PROVIDER_OBO, 'Cell Ontology'),
+    # link via Marker detail
+    ('MGI', linklib.DETAIL, 'Marker'),
+    # remove prefix for linking
+    ('ENSEMBL', linklib.PROVIDER, 'Ensembl Gene Model'),
+    # keep the PR: prefix
+    ('PR', linklib.OBO, None),
+    # remove prefix for linking
+    ('UniProtKB', linklib.PROVIDER, 'UniProt'),
+]
+
 def readCommandLine():
     """
     Read command line input returns options
@@ -100,10 +122,13 @@ def readCommandLine():
 def queryAnnotExtensions():
     """
     Query all the annotation extensions 
+    yields the properties in batches, ordered by _evidenceproperty_key
     """
     
     # get the correct _propertyterm_keys and _evidenceterm_keys for annotation extensions
     extensionProcessor = go_annot_extensions.Processor()
+    # repeated values are processed once (see lib/memolib.py)
+    processValue = memolib.Memo('processValue', extensionProcessor.processValue)
     propertyTermKeys = extensionProcessor.querySanctionedPropertyTermKeys()
     evidenceTermKeys = extensionProcessor.querySanctionedEvidenceTermKeys()
     
@@ -111,79 +136,83 @@ def queryAnnotExtensions():
     evidenceTermKeyClause = ",".join([str(k) for k in evidenceTermKeys])
     
     #
-    # search for all annotations where voc_evidence_property where 
+    # the annotations where voc_evidence_property where
     #   voc_annot.ve._evidenceterm_key matches evidenceTermKeyClause
     #   voc_evidence_property._propertyterm_key matches propertyTermKeyClause
-    # and
-    #   1. search for all annotations where voc_evidence_property.value matches acc_accession.accid of a vocabulary term
-    #   union
-    #   2. search for all annotations where voc_evidence_property.value matches acc_accession.accid of a marker
-    #   union
-    #   3. search for all annotations where voc_evidence_property.value does not match acc_accession.accid (1 or 2)
+    # are read once into a temp table (goExtProperty)
+    #
+    # the distinct values of goExtProperty are then matched (one query) to
+    #   1. acc_accession.accid of a vocabulary term
+    #   2. acc_accession.accid of a marker
+    # and each property is resolved using this accid index:
+    #   a row for each matching term/marker, or (null, null) if neither (3)
     #
 
-    query = '''
-        (
-        select distinct a.accid, t.term, vep._evidenceproperty_key, vep.value
-        from acc_accession a, voc_term t, voc_annot va, voc_evidence ve, voc_evidence_property vep
+    db.sql('''
+        select vep._evidenceproperty_key, vep.value
+        into temporary table goExtProperty
+        from voc_annot va, voc_evidence ve, voc_evidence_property vep
         where va._annottype_key = 1000
             and va._annot_key = ve._annot_key
             and ve._evidenceterm_key in (%s)
             and ve._annotevidence_key = vep._annotevidence_key
             and vep._propertyterm_key in (%s)
             and vep.value != ''
-            and vep.value = a.accid
+        ''' % (evidenceTermKeyClause, propertyTermKeyClause), None)
+    db.sql('create index idx_goExtProperty on goExtProperty(value)', None)
+    db.sql('analyze goExtProperty', None)
+
+    accResults = db.sql('''
+        select distinct a.accid, t.term
+        from acc_accession a, voc_term t
+        where a.accid in (select value from goExtProperty)
             and a.private = 0
             and a._mgitype_key = 13
             and a._object_key = t._term_key
         union all
-        select distinct a.accid, m.symbol, vep._evidenceproperty_key, vep.value
-        from acc_accession a, mrk_marker m, voc_annot va, voc_evidence ve, voc_evidence_property vep
-        where va._annottype_key = 1000
-            and va._annot_key = ve._annot_key
-            and ve._evidenceterm_key in (%s)
-            and ve._annotevidence_key = vep._annotevidence_key
-            and vep._propertyterm_key in (%s)
-            and vep.value != ''
-            and vep.value = a.accid
+        select distinct a.accid, m.symbol
+        from acc_accession a, mrk_marker m
+        where a.accid in (select value from goExtProperty)
             and a._mgitype_key = 2
             and a.preferred = 1
             and a._logicaldb_key = 1
             and a.prefixpart = 'MGI:'
             and a._object_key = m._marker_key
-        union all
-        select distinct null, null, vep._evidenceproperty_key, vep.value
-        from voc_annot va, voc_evidence ve, voc_evidence_property vep
-        where va._annottype_key = 1000
-            and va._annot_key = ve._annot_key
-            and ve._evidenceterm_key in (%s)
-            and ve._annotevidence_key = vep._annotevidence_key
-            and vep._propertyterm_key in (%s)
-            and vep.value != ''
-            and not exists (select 1 from acc_accession a, voc_term t
-                where vep.value = a.accid
-                and a.private = 0
-                and a._mgitype_key = 13
-                and a._object_key = t._term_key
-                )
-            and not exists (select 1 from acc_accession a, mrk_marker m
-                where vep.value = a.accid
-                and a._mgitype_key = 2
-                and a.preferred = 1
-                and a._logicaldb_key = 1
-                and a.prefixpart = 'MGI:'
-                and a._object_key = m._marker_key
-                )
-        )
-        order by value
-    ''' % (evidenceTermKeyClause, propertyTermKeyClause, evidenceTermKeyClause, propertyTermKeyClause, evidenceTermKeyClause, propertyTermKeyClause)
-    
-    results = db.sql(query, "auto")
+        ''', 'auto')
+
+    # accid -> [(accid, term or marker symbol)]
+    accLookup = {}
+    for r in accResults:
+        if r['accid'] not in accLookup:
+            accLookup[r['accid']] = []
+        accLookup[r['accid']].append((r['accid'], r['term']))
+
+    # read the properties in batches of FETCH_SIZE, ordered by _evidenceproperty_key
+    db.sql('''
+        declare goExtCursor no scroll cursor for
+        select _evidenceproperty_key, value from goExtProperty order by _evidenceproperty_key
+        ''', None)
+
+    while True:
+
+        propertyResults = db.sql('fetch forward %d from goExtCursor' % (FETCH_SIZE), 'auto')
+        if len(propertyResults) == 0:
+            break
+
+        results = []
+        for r in propertyResults:
+            for accid, term in accLookup.get(r['value'], [(None, None)]):
+                results.append({'accid' : accid, 'term' : term,
+                    '_evidenceproperty_key' : r['_evidenceproperty_key'], 'value' : r['value']})
     
-    for r in results:
-        r['value'] = extensionProcessor.processValue(r['value'])
+        for r in results:
+            r['value'] = processValue(r['value'])
     
-    return results
+        yield results
+
+    db.sql('close goExtCursor', None)
+    processValue.report()
+    db.sql('drop table goExtProperty', None)
 
 def queryProviderLinkMap():
     """
@@ -210,150 +239,114 @@ def queryProviderLinkMap():
     return providerLinkMap
     
 ### Business Logic Functions ###
-def transformProperties(properties, providerLinkMap={}):
+def transformProperties(properties, providerLinkMap={}, render=None):
     """
     Transform the properties into their display values using provided 
             providerLinkMap {actualdb.name : urlpattern} -- for external urls
     
+    render -- linklib.memoRenderLink() to re-use across calls (built from providerLinkMap if None)
+    
     returns [ {'displayNote', '_evidenceproperty_key'}, ]
     """
     
     transformed = []
 
-    # Regex for special provider/logical DB hanlding
-    CL_regex = re.compile(r'^CL:', re.I)
-    EMAPA_regex = re.compile(r'^EMAPA:', re.I)
-    ENSEMBL_regex = re.compile(r'^ENSEMBL:', re.I)
-    GO_regex = re.compile(r'^GO:', re.I)
-    MGI_regex = re.compile(r'^MGI:', re.I)
-    PRO_regex = re.compile(r'^PR:', re.I)
-    UNIPROTKB_regex = re.compile(r'^UniprotKB:', re.I)
+    # one dispatch table by id prefix, rendered through a bounded LRU cache (see lib/linklib.py)
+    if render is None:
+        render = linklib.memoRenderLink(linklib.buildLinks(LINK_RULES, providerLinkMap))
     
     #print(providerLinkMap)
 
     for property in properties:
 
-        value = property['value']
-        id = property['accid']
-        term = property['term']
-
-        if GO_regex.match(value):
-                # link GO ID to GO term detail
-                if id is not None:
-                        value = makeNoteTag(value, term, 'GO')
-                
-        elif EMAPA_regex.match(value):
-                # link EMAPA ID to EMAPA term detail
-                if id is not None:
-                        value = makeNoteTag(value, term, 'EMAPA')
-                
-        elif CL_regex.match(value) and 'Cell Ontology' in providerLinkMap:
-                # link form of ID has an underscore
-                linkValue = value.replace(':','_')
-                url = providerLinkMap['Cell Ontology'].replace('@@@@', linkValue)
-                value = makeNoteTag(url, term)
-                
-        elif MGI_regex.match(value):
-                # link via Marker detail
-                if id is not None:
-                        value = makeNoteTag(value, term, 'Marker')
-                
-        elif ENSEMBL_regex.match(value) and 'Ensembl Gene Model' in providerLinkMap:
-            # remove prefix for linking
-            linkValue = value[ (value.find(':') + 1) : ]
-            url = providerLinkMap['Ensembl Gene Model'].replace('@@@@', linkValue)
-            value = makeNoteTag(url, value)
-        
-        elif PRO_regex.match(value):
-             # keep the PR: prefix
-            linkValue = value.replace(':','_')
-            url = 'https://purl.obolibrary.org/obo/' + linkValue
-            value = makeNoteTag(url, value)
-        
-        elif UNIPROTKB_regex.match(value) and 'UniProt' in providerLinkMap:
-            # remove prefix for linking
-            linkValue = value[ (value.find(':') + 1) : ]
-            url = providerLinkMap['UniProt'].replace('@@@@', linkValue)
-            value = makeNoteTag(url, value)
-            
-        else:
-            #only use if debugging
-            #print("Could not map ID = %s" % value)
-            pass
-        
         transformed.append({
-         'displayNote': value,
+         'displayNote': render(property['value'], property['accid'], property['term']),
          '_evidenceproperty_key': property['_evidenceproperty_key']   
         })
     
     return transformed    
 
-def makeNoteTag(url, display, type='Link'):
-    """
-    return an MGI note tag string
-    """ 
-    return '\\\\%s(%s|%s|)' % (type, url, display)
-
 ### Functions to perform the updates ###    
 
-def writeToBCPFile(properties, noteFile, startingKey):
+# _note_key of the next new note; set by the first new note
+nextNoteKey = None
+
+def writeNotes(properties):
     """
-    Write the properties to the output files noteFile for MGI_Note increment _note_key using startingKey
+    Insert the new notes into MGI_Note, in the same transaction as the updates/deletes
     """
 
-    key = startingKey
+    global nextNoteKey
+
+    if nextNoteKey is None:
+        # get _note_key to use for inserts
+        results = db.sql(''' select nextval('mgi_note_seq') as maxKey ''', 'auto')
+        nextNoteKey = results[0]['maxKey']
+
+    notes = []
     for property in properties:
-        # write MGI_Note
-        note = [key,
+        notes.append([nextNoteKey,
                 property['_evidenceproperty_key'],
                 PROPERTY_MGITYPE_KEY,
                 DISPLAY_NOTE_TYPE_KEY,
-                property['displayNote'],
+                notecachelib.noteValue(property['displayNote']),
                 CREATEDBY_KEY,
                 CREATEDBY_KEY,
                 CDATE,
                 CDATE
-                ]
-        noteFile.write('%s%s' % (COLDL.join([str(c) for c in note]), LINEDL) )
-        key += 1
+                ])
+        nextNoteKey += 1
+
+    notecachelib.insertNotes(notes)
+    runstats.addRows(written=len(properties))
+
+def streamProperties(providerLinkMap):
+    """
+    Query and transform the properties, one batch at a time
+    """
+
+    # the same link cache is used for all of the batches
+    render = linklib.memoRenderLink(linklib.buildLinks(LINK_RULES, providerLinkMap))
+
+    # the rows fetched are counted as read by runstats (db.sql)
+    for properties in queryAnnotExtensions():
+        yield from transformProperties(properties, providerLinkMap, render)
+
+    render.report()
 
 def process():
     """
     Process the cache load
-    Drop/reloads 'GO Property Display' notes 
-        (either all, or for specific evidenceKey)
+    Refreshes 'GO Property Display' notes:
+        only the notes that were added/changed/removed are inserted/updated/deleted
+        (see lib/notecachelib.py)
+    the properties are read/transformed/loaded in batches:
+        cursor -> transformProperties() -> insert into MGI_Note
+    the refresh is one transaction: if any step fails, it is rolled back
     """
 
-    # drop existing notes
-    db.sql('delete from mgi_note where _notetype_key = %d' % DISPLAY_NOTE_TYPE_KEY, None)
-    
-    # get _note_key to use for inserts
-    results = db.sql(''' select nextval('mgi_note_seq') as maxKey ''', 'auto')
-    startingNoteKey = results[0]['maxKey']
-    
-    properties = queryAnnotExtensions()
-    providerLinkMap = queryProviderLinkMap()
-    
-    noteFile = open(NOTE_BCP_FILE, 'w')
-    
+    with runstats.phase('query'):
+        providerLinkMap = queryProviderLinkMap()
+
     try:
-        # transform the properties to their display/links
-        properties = transformProperties(properties, providerLinkMap)
-            
-        # write BCP files
-        writeToBCPFile(properties, noteFile, startingNoteKey)
+        # update/delete the existing notes; the new notes are inserted by writeNotes()
+        with runstats.phase('refreshNotes'):
+            notecachelib.refreshNotes(DISPLAY_NOTE_TYPE_KEY, streamProperties(providerLinkMap), writeNotes)
+
+        if nextNoteKey is not None:
+            db.sql(''' select setval('mgi_note_seq', (select max(_note_key) from MGI_Note)) ''', None)
+
+    except:
+        db.sql('rollback', None)
+        raise
 
-    finally:
-        noteFile.close()
-    
-    # insert the new data    
-    db.bcp(NOTE_BCP_FILE, 'MGI_Note', setval="mgi_note_seq", setkey="_note_key")
     db.commit()
 
 if __name__ == "__main__":
     
     # process using command line input
     options = readCommandLine()
+    runstats.start('go_annot_extensions_display')
     process()
     db.commit()
     
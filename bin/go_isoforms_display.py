@@ -8,12 +8,19 @@ Load the cache of notes representing the display values for GO annotation isofor
 """
 
 from optparse import OptionParser
+import sys
 import os
-import re
 import db
 import mgi_utils
 import go_isoforms
 
+goloadpath = os.environ['GOLOAD'] + '/lib'
+sys.path.insert(0, goloadpath)
+import runstats
+import notecachelib
+import linklib
+import memolib
+
 db.setTrace()
 
 USAGE="""
@@ -22,11 +29,8 @@ usage: %prog [-S -D -U -P]
 
 ### Constants ###
 
-OUT_DIR = os.environ['OUTPUTDIR']
-COLDL = '\t'
-LINEDL = '\n'
-
-NOTE_BCP_FILE = OUT_DIR + "/MGI_Note.go_isoforms.bcp"
+# number of properties read from the cursor at a time
+FETCH_SIZE = 50000
 
 # note type for annotation extension display/link
 DISPLAY_NOTE_TYPE_KEY = 1046
@@ -48,6 +52,17 @@ DATABASE_PROVIDERS = [
     ('SWISS-PROT', 'UniProt')
 ]
 
+# id prefix -> link (see lib/linklib.py)
+LINK_RULES = [
+    # special provider cases; remove prefix for linking
+    ('EMBL', linklib.PROVIDER, 'EMBL'),
+    ('NCBI', linklib.PROVIDER, 'RefSeq'),
+    # keep the PR: prefix
+    ('PR', linklib.OBO, None),
+    ('RefSeq', linklib.PROVIDER, 'RefSeq'),
+    ('UniProtKB', linklib.PROVIDER, 'UniProt'),
+]
+
 def readCommandLine():
     """
     Read command line input returns options
@@ -92,10 +107,13 @@ def readCommandLine():
 def queryAnnotExtensions():
     """
     Query all the annotation extensions 
+    yields the properties in batches, ordered by _evidenceproperty_key
     """
     
     # get the correct _propertyterm_keys for annotation isoforms
     isoformProcessor = go_isoforms.Processor()
+    # repeated values are processed once (see lib/memolib.py)
+    processValue = memolib.Memo('processValue', isoformProcessor.processValue)
     propertyTermKeys = isoformProcessor.querySanctionedPropertyTermKeys()
 
     propertyTermKeyClause = ",".join([str(k) for k in propertyTermKeys])
@@ -105,7 +123,9 @@ def queryAnnotExtensions():
     #   voc_evidence_property._propertyterm_key matches propertyTermKeyClause
     #
 
+    # read the properties in batches of FETCH_SIZE, ordered by _evidenceproperty_key
     query = '''
+        declare goIsoformCursor no scroll cursor for
         select vep.*
         from voc_annot va, voc_evidence ve, voc_evidence_property vep
         where va._annottype_key = 1000
@@ -113,15 +133,24 @@ def queryAnnotExtensions():
             and ve._annotevidence_key = vep._annotevidence_key
             and vep._propertyterm_key in (%s)
             and vep.value != ''
-        order by value
+        order by vep._evidenceproperty_key
     ''' % (propertyTermKeyClause)
     
-    results = db.sql(query, "auto")
+    db.sql(query, None)
+
+    while True:
+
+        results = db.sql('fetch forward %d from goIsoformCursor' % (FETCH_SIZE), 'auto')
+        if len(results) == 0:
+            break
     
-    for r in results:
-        r['value'] = isoformProcessor.processValue(r['value'])
+        for r in results:
+            r['value'] = processValue(r['value'])
     
-    return results
+        yield results
+
+    db.sql('close goIsoformCursor', None)
+    processValue.report()
 
 def queryProviderLinkMap():
     """
@@ -148,56 +177,24 @@ def queryProviderLinkMap():
     return providerLinkMap
     
 ### Business Logic Functions ###
-def transformProperties(properties, providerLinkMap={}):
+def transformProperties(properties, providerLinkMap={}, render=None):
     """
     Transform the properties into their display values
     
+    render -- linklib.memoRenderLink() to re-use across calls (built from providerLinkMap if None)
+    
     returns [ {'displayNote', '_evidenceproperty_key'}, ]
     """
     
     transformed = []
 
-    # Regex for special provider/logical DB hanlding
-    EMBL_regex = re.compile(r'^EMBL:', re.I)
-    NCBI_regex = re.compile(r'^NCBI:', re.I)
-    PRO_regex = re.compile(r'^PR:', re.I)
-    REFSEQ_regex = re.compile(r'^RefSeq:', re.I)
-    UNIPROTKB_regex = re.compile(r'^UniprotKB:', re.I)
+    # one dispatch table by id prefix, rendered through a bounded LRU cache (see lib/linklib.py)
+    if render is None:
+        render = linklib.memoRenderLink(linklib.buildLinks(LINK_RULES, providerLinkMap))
     
     for property in properties:
         
-        values = []
-
-        for value in property['value']:
-           
-            # special provider cases
-            if EMBL_regex.match(value) and 'EMBL' in providerLinkMap:
-                linkValue = value[ (value.find(':') + 1) : ]
-                url = providerLinkMap['EMBL'].replace('@@@@', linkValue)
-                value = makeNoteTag(url, value)
-                
-            elif NCBI_regex.match(value) and 'RefSeq' in providerLinkMap:
-                linkValue = value[ (value.find(':') + 1) : ]
-                url = providerLinkMap['RefSeq'].replace('@@@@', linkValue)
-                value = makeNoteTag(url, value)
-                
-            elif PRO_regex.match(value):
-                # keep the PR: prefix
-                linkValue = value.replace(':','_')
-                url = 'https://purl.obolibrary.org/obo/' + linkValue
-                value = makeNoteTag(url, value)
-                
-            elif REFSEQ_regex.match(value) and 'RefSeq' in providerLinkMap:
-                linkValue = value[ (value.find(':') + 1) : ]
-                url = providerLinkMap['RefSeq'].replace('@@@@', linkValue)
-                value = makeNoteTag(url, value)
-                
-            elif UNIPROTKB_regex.match(value) and 'UniProt' in providerLinkMap:
-                linkValue = value[ (value.find(':') + 1) : ]
-                url = providerLinkMap['UniProt'].replace('@@@@', linkValue)
-                value = makeNoteTag(url, value)
-                
-            values.append(value)
+        values = [render(value) for value in property['value']]
         
         if values:
             value = ", ".join(values)
@@ -209,72 +206,87 @@ def transformProperties(properties, providerLinkMap={}):
 
     return transformed    
 
-def makeNoteTag(url, display, type='Link'):
-    """
-    return an MGI note tag string
-    """ 
-    return '\\\\%s(%s|%s|)' % (type, url, display)
-
 ### Functions to perform the updates ###    
 
-def writeToBCPFile(properties, noteFile, startingKey):
+# _note_key of the next new note; set by the first new note
+nextNoteKey = None
+
+def writeNotes(properties):
     """
-    Write the properties to the output files noteFile for MGI_Note increment _note_key using startingKey
+    Insert the new notes into MGI_Note, in the same transaction as the updates/deletes
     """
 
-    key = startingKey
+    global nextNoteKey
+
+    if nextNoteKey is None:
+        # get _note_key to use for inserts
+        results = db.sql(''' select nextval('mgi_note_seq') as maxKey ''', 'auto')
+        nextNoteKey = results[0]['maxKey']
+
+    notes = []
     for property in properties:
-        # write MGI_Note
-        note = [key,
+        notes.append([nextNoteKey,
                 property['_evidenceproperty_key'],
                 PROPERTY_MGITYPE_KEY,
                 DISPLAY_NOTE_TYPE_KEY,
-                property['displayNote'],
+                notecachelib.noteValue(property['displayNote']),
                 CREATEDBY_KEY,
                 CREATEDBY_KEY,
                 CDATE,
                 CDATE
-                ]
-        noteFile.write('%s%s' % (COLDL.join([str(c) for c in note]), LINEDL) )
-        key += 1
+                ])
+        nextNoteKey += 1
+
+    notecachelib.insertNotes(notes)
+    runstats.addRows(written=len(properties))
+
+def streamProperties(providerLinkMap):
+    """
+    Query and transform the properties, one batch at a time
+    """
+
+    # the same link cache is used for all of the batches
+    render = linklib.memoRenderLink(linklib.buildLinks(LINK_RULES, providerLinkMap))
+
+    # the rows fetched are counted as read by runstats (db.sql)
+    for properties in queryAnnotExtensions():
+        yield from transformProperties(properties, providerLinkMap, render)
+
+    render.report()
 
 def process():
     """
     Process the cache load
-    Drop/reloads 'GO Property Display' notes 
-        (either all, or for specific evidenceKey)
+    Refreshes 'GO Property Display' notes:
+        only the notes that were added/changed/removed are inserted/updated/deleted
+        (see lib/notecachelib.py)
+    the properties are read/transformed/loaded in batches:
+        cursor -> transformProperties() -> insert into MGI_Note
+    the refresh is one transaction: if any step fails, it is rolled back
     """
 
-    # drop existing notes
-    db.sql('delete from mgi_note where _notetype_key = %d' % DISPLAY_NOTE_TYPE_KEY, None)
-    
-    # get _note_key to use for inserts
-    results = db.sql(''' select nextval('mgi_note_seq') as maxKey ''', 'auto')
-    startingNoteKey = results[0]['maxKey']
-    
-    properties = queryAnnotExtensions()
-    providerLinkMap = queryProviderLinkMap()
-    
-    noteFile = open(NOTE_BCP_FILE, 'w')
-    
+    with runstats.phase('query'):
+        providerLinkMap = queryProviderLinkMap()
+
     try:
-        # transform the properties to their display/links
-        properties = transformProperties(properties, providerLinkMap)
-            
-        # write BCP files
-        writeToBCPFile(properties, noteFile, startingNoteKey)
+        # update/delete the existing notes; the new notes are inserted by writeNotes()
+        with runstats.phase('refreshNotes'):
+            notecachelib.refreshNotes(DISPLAY_NOTE_TYPE_KEY, streamProperties(providerLinkMap), writeNotes)
+
+        if nextNoteKey is not None:
+            db.sql(''' select setval('mgi_note_seq', (select max(_note_key) from MGI_Note)) ''', None)
+
+    except:
+        db.sql('rollback', None)
+        raise
 
-    finally:
-        noteFile.close()
-    
-    # insert the new data    
-    db.bcp(NOTE_BCP_FILE, 'MGI_Note', setval="mgi_note_seq", setkey="_note_key")
     db.commit()
 
 if __name__ == "__main__":
     
     # process using command line input
     options = readCommandLine()
+    runstats.start('go_isoforms_display')
     process()
     db.commit()
     
@@ -0,0 +1,236 @@
+'''
+#
+# godelta.py
+#
+#       The purpose of this script is to load only the GO annotations that changed
+#       since the previous run, instead of deleting/reloading all of them
+#
+#       The annotations are grouped by key:
+#               1:  GO ID
+#               2:  MGI ID of the Marker
+#               3:  J:
+#               4:  Evidence Code
+#               7:  Editor (assignedBy)
+#
+#       and each group has a fingerprint (a hash of its sorted rows)
+#
+#       godelta.py :
+#               compare the fingerprints of ${INFILE_NAME} with ${DELTA_FINGERPRINT_FILE}
+#               delete the VOC_Evidence/VOC_Annot of the groups that changed or were removed
+#               write the rows of the groups that changed or were added to ${INFILE_NAME_DELTA}
+#               (which is then loaded by annotload using goannotdelta.config)
+#
+#       godelta.py -s :
+#               save the fingerprints of ${INFILE_NAME} to ${DELTA_FINGERPRINT_FILE}
+#               run this after the annotation load has succeeded
+#
+#       the fingerprint file is removed by godelta.py (without -s), so if the load does
+#       not finish, the next run will do a full delete/reload (see goload.sh)
+#
+# Inputs:
+#
+#       ${INFILE_NAME}             the annotation file created by goload.py
+#       ${DELTA_FINGERPRINT_FILE}  the fingerprints saved by the previous run
+#
+# Outputs:
+#
+#       ${INFILE_NAME_DELTA}       the annotation rows to load
+#
+# Usage:
+#       godelta.py [-s]
+#
+# History:
+#
+'''
+
+import sys
+import os
+import hashlib
+import db
+
+db.setTrace()
+
+annotFileName = os.environ['INFILE_NAME']
+deltaFileName = os.environ['INFILE_NAME_DELTA']
+fingerprintFileName = os.environ['DELTA_FINGERPRINT_FILE']
+
+# number of keys per insert statement
+BATCH_SIZE = 1000
+
+#
+# Purpose: return the group key of an annotation row
+#
+def annotKey(tokens):
+
+    return '\t'.join((tokens[0], tokens[1], tokens[2], tokens[3], tokens[6]))
+
+#
+# Purpose: read the annotation file and return {key : fingerprint}
+#
+def readFingerprints():
+
+    groups = {}
+
+    annotFile = open(annotFileName, 'r')
+    for line in annotFile:
+        key = annotKey(line.split('\t'))
+        if key not in groups:
+            groups[key] = []
+        groups[key].append(hashlib.blake2b(line.encode(), digest_size=16).digest())
+    annotFile.close()
+
+    fingerprints = {}
+    for key in groups:
+        fingerprints[key] = hashlib.blake2b(b''.join(sorted(groups[key])), digest_size=16).hexdigest()
+
+    return fingerprints
+
+#
+# Purpose: read the fingerprints saved by the previous run
+#
+def readPreviousFingerprints():
+
+    fingerprints = {}
+
+    fingerprintFile = open(fingerprintFileName, 'r')
+    for line in fingerprintFile:
+        key, fingerprint = line[:-1].rsplit('\t', 1)
+        fingerprints[key] = fingerprint
+    fingerprintFile.close()
+
+    return fingerprints
+
+#
+# Purpose: save the fingerprints of this run
+#
+def saveFingerprints():
+
+    fingerprints = readFingerprints()
+
+    tmpFileName = fingerprintFileName + '.tmp'
+    fingerprintFile = open(tmpFileName, 'w')
+    for key in sorted(fingerprints):
+        fingerprintFile.write('%s\t%s\n' % (key, fingerprints[key]))
+    fingerprintFile.close()
+    os.replace(tmpFileName, fingerprintFileName)
+
+    print('saved fingerprints: ', len(fingerprints))
+
+    return 0
+
+#
+# Purpose: delete the VOC_Evidence/VOC_Annot for the group keys
+#
+def deleteAnnotations(keys):
+
+    db.sql('''create temporary table deltaKeys (
+        goID text, markerID text, jnumID text, evidence text, editor text)
+        ''', None)
+
+    keys = sorted(keys)
+    for i in range(0, len(keys), BATCH_SIZE):
+        values = []
+        for key in keys[i:i + BATCH_SIZE]:
+            values.append('(%s)' % ','.join(["'%s'" % (k.replace("'", "''")) for k in key.split('\t')]))
+        db.sql('insert into deltaKeys values %s' % (','.join(values)), None)
+
+    db.sql('''
+        create temporary table deltaEvidence as
+        select e._AnnotEvidence_key, e._Annot_key
+        from deltaKeys d, ACC_Accession ta, ACC_Accession ma, ACC_Accession ja,
+                VOC_Term et, MGI_User u, VOC_Annot a, VOC_Evidence e
+        where ta.accID = d.goID
+        and ta._MGIType_key = 13
+        and ta._LogicalDB_key = 31
+        and ta.preferred = 1
+        and ma.accID = d.markerID
+        and ma._MGIType_key = 2
+        and ma._LogicalDB_key = 1
+        and ma.preferred = 1
+        and ja.accID = d.jnumID
+        and ja._MGIType_key = 1
+        and ja._LogicalDB_key = 1
+        and ja.prefixPart = 'J:'
+        and et._Vocab_key = 3
+        and et.abbreviation = d.evidence
+        and u.login = d.editor
+        and a._AnnotType_key = 1000
+        and a._Term_key = ta._Object_key
+        and a._Object_key = ma._Object_key
+        and a._Annot_key = e._Annot_key
+        and e._Refs_key = ja._Object_key
+        and e._EvidenceTerm_key = et._Term_key
+        and e._CreatedBy_key = u._User_key
+        ''', None)
+
+    results = db.sql('select count(*) as counter from deltaEvidence', 'auto')
+    print('deleting evidence: ', results[0]['counter'])
+
+    db.sql('delete from VOC_Evidence e using deltaEvidence d where e._AnnotEvidence_key = d._AnnotEvidence_key', None)
+    db.sql('''delete from VOC_Annot a using deltaEvidence d
+        where a._Annot_key = d._Annot_key
+        and not exists (select 1 from VOC_Evidence e where e._Annot_key = a._Annot_key)
+        ''', None)
+    db.commit()
+
+    return 0
+
+#
+# Purpose: write the rows of the group keys to the delta file
+#
+def writeDelta(keys):
+
+    rows = 0
+    annotFile = open(annotFileName, 'r')
+    deltaFile = open(deltaFileName, 'w')
+    for line in annotFile:
+        if annotKey(line.split('\t')) in keys:
+            deltaFile.write(line)
+            rows += 1
+    deltaFile.close()
+    annotFile.close()
+
+    print('delta rows: ', rows)
+
+    return 0
+
+#
+# Purpose: compare this run with the previous run, delete/write the changes
+#
+def processDelta():
+
+    previous = readPreviousFingerprints()
+
+    # if this run does not finish, then the next run must do a full reload
+    os.remove(fingerprintFileName)
+
+    current = readFingerprints()
+
+    added = set(current) - set(previous)
+    removed = set(previous) - set(current)
+    changed = set([k for k in current if k in previous and current[k] != previous[k]])
+
+    print('annotation groups: ', len(current))
+    print('added: ', len(added))
+    print('changed: ', len(changed))
+    print('removed: ', len(removed))
+    print('unchanged: ', len(current) - len(added) - len(changed))
+
+    if len(changed) > 0 or len(removed) > 0:
+        deleteAnnotations(changed | removed)
+
+    writeDelta(changed | added)
+
+    return 0
+
+#
+# main
+#
+
+if len(sys.argv) > 1 and sys.argv[1] == '-s':
+    status = saveFingerprints()
+else:
+    status = processDelta()
+
+sys.exit(status)
+
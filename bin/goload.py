@@ -6,7 +6,7 @@
 #
 # Inputs:
 #
-#       ${MGIINFILE_NAME_GPAD}     the MGI GPAD file
+#       ${FROM_MGIINFILE_NAME_GZ}  the MGI GPAD file (gzipped; read as a stream)
 #
 #       The GPAD 2.0 file contains:
 #		1:  DB_Object_ID
@@ -51,12 +51,20 @@
 
 import sys 
 import os
+import collections
+import multiprocessing
 import db
 
 goloadpath = os.environ['GOLOAD'] + '/lib'
 sys.path.insert(0, goloadpath)
 import ecolib
 import uberonlib
+import gpadlib
+import cachelib
+import extensionlib
+import normlib
+import runstats
+import lookuplib
 
 # GPAD files from the dataloads directory
 gpadInFileName = None
@@ -74,7 +82,31 @@ pubmedFileName = None
 # error file pointer
 errorFile = None
 pubmedFile = None
-hasError = 0
+
+# see annotload/annotload.py for format
+# 6:  Qualifier : null
+# 9:  Notes : none
+# 10: logicalDB : MGI
+annotLine = '%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t\tMGI\t%s\n' 
+
+# number of worker processes used to translate the GPAD (1 = no worker processes)
+workers = int(os.environ.get('GOLOAD_WORKERS', '1'))
+# number of GPAD lines per chunk
+GPAD_CHUNK_SIZE = 10000
+
+# the distinct 5:References ids written by gpadscan.py
+# if set, only these references are read from BIB_Citation_Cache
+refsFileName = os.environ.get('INFILE_NAME_REFS', '')
+# number of reference ids per insert statement
+REF_BATCH_SIZE = 1000
+
+# the format of each lookup saved in ${LOOKUPCACHEDIR} (see cachelib.py)
+# add 1 when its build function or class changes (buildRefLookup/lookuplib.RefLookup,
+# buildGPILookup, ecolib.processECO, uberonlib.readUberonLookup)
+MGIREF_LOOKUP_VERSION = 1
+GPI_LOOKUP_VERSION = 1
+ECO_LOOKUP_VERSION = 1
+UBERON_LOOKUP_VERSION = 1
 
 #
 # use gpi file to build gpiLookup of object:MGI:xxxx relationship
@@ -82,7 +114,6 @@ hasError = 0
 databaseIDSet = ['MGI', 'PR', 'EMBL', 'ENSEMBL', 'RefSeq']
 gpiSet = ['PR', 'EMBL', 'ENSEMBL', 'RefSeq']
 gpiFileName = None
-gpiFile = None
 gpiLookup = {}
 
 # lookup file of mgi ids or pubmed ids -> J:
@@ -106,7 +137,92 @@ uberonLookup = {}
 roLookup = {}
 
 # lookup file of assignedBy -> MGI User/login
-userLookup = []
+userLookup = set()
+
+# the distinct assignedBy (MGI User/login) of the translated annotations
+assignedByLookup = set()
+
+#
+# Purpose: Build the lookup of mgi ids or pubmed ids -> J:
+#
+def buildRefLookup():
+
+    pairs = []
+
+    if refsFileName:
+        results = queryGPADRefs()
+    else:
+        results = db.sql('select mgiID, pubmedID, jnumID from BIB_Citation_Cache where jnumID is not null', 'auto')
+
+    for r in results:
+        pairs.append((r['mgiID'], r['jnumID']))
+        if r['pubmedID'] != '' and r['pubmedID'] is not None:
+            pairs.append((r['pubmedID'], r['jnumID']))
+    del results
+
+    # sorted integer arrays instead of a dictionary of strings (see lookuplib.py)
+    lookup = lookuplib.RefLookup(pairs)
+    #print(lookup['14321840'])
+
+    return lookup
+
+#
+# Purpose: Query the BIB_Citation_Cache rows of the references in ${INFILE_NAME_REFS}
+#	the reference ids are loaded into a temp table, and resolved with one query
+#
+def queryGPADRefs():
+
+    refIDs = []
+    refsFile = open(refsFileName, 'r')
+    for line in refsFile:
+        r = line.strip()
+        if r != '':
+            refIDs.append("('" + r.replace("'", "''") + "')")
+    refsFile.close()
+
+    print('reference ids: ', len(refIDs))
+
+    db.sql('create temporary table goRefIDs (refID text)', None)
+    for i in range(0, len(refIDs), REF_BATCH_SIZE):
+        db.sql('insert into goRefIDs values %s' % (','.join(refIDs[i:i + REF_BATCH_SIZE])), None)
+    db.sql('create index idx_goRefIDs on goRefIDs(refID)', None)
+    db.sql('analyze goRefIDs', None)
+
+    results = db.sql('''
+        select c.mgiID, c.pubmedID, c.jnumID
+        from goRefIDs r, BIB_Citation_Cache c
+        where r.refID = c.mgiID
+        and c.jnumID is not null
+        union
+        select c.mgiID, c.pubmedID, c.jnumID
+        from goRefIDs r, BIB_Citation_Cache c
+        where r.refID = c.pubmedID
+        and c.jnumID is not null
+        ''', 'auto')
+
+    db.sql('drop table goRefIDs', None)
+
+    return results
+
+#
+# Purpose: Build the lookup of object -> Marker from the gpi file
+#
+def buildGPILookup():
+
+    lookup = {}
+
+    gpiFile = open(gpiFileName, 'r')
+    for r in gpadlib.readGPI(gpiFile):
+        tokens2 = r.dbObjectID.split(':')
+        if tokens2[0] in gpiSet:
+            key = r.dbObjectID
+            # the markers are shared by many isoforms; most isoforms have 1 marker
+            value = sys.intern(r.parentObjectID.replace('MGI:MGI:', 'MGI:'))
+            lookup[key] = lookup.get(key, ()) + (value,)
+    gpiFile.close()
+    #print(lookup)
+
+    return lookup
 
 #
 # Purpose: Initialization
@@ -117,7 +233,7 @@ def initialize():
     global annotFileName, annotFile
     global errorFileName, errorFile
     global pubmedFileName, pubmedFile
-    global gpiFileName, gpiFile, gpiLookup
+    global gpiFileName, gpiLookup
     global mgiRefLookup
     global goRefLookup
     global ecoLookupByEco
@@ -130,60 +246,69 @@ def initialize():
     # open files
     #
 
-    gpadInFileName = os.environ['MGIINFILE_NAME_GPAD']
+    gpadInFileName = os.environ['FROM_MGIINFILE_NAME_GZ']
     gpiFileName = os.environ['GPIFILE']
     annotFileName = os.environ['INFILE_NAME']
     errorFileName = os.environ['INFILE_NAME_ERROR']
     pubmedFileName = os.environ['PUBMED_ERROR']
 
-    gpadInFile = open(gpadInFileName, 'r')
-    gpiFile = open(gpiFileName, 'r')
+    gpadInFile = gpadlib.openGPAD(gpadInFileName)
     annotFile = open(annotFileName, 'w')
     errorFile = open(errorFileName, 'w')
     pubmedFile = open(pubmedFileName, 'w')
 
+    #
+    # the mgiRef, gpi, eco and uberon lookups are saved in ${LOOKUPCACHEDIR} (see cachelib.py)
+    # and are only re-built if their source file/tables have changed since they were saved
+    #
+
     #
     # lookup file of mgi ids or pubmed ids -> J:
     # mgi id:jnum id
     # pubmed id:jnum id
+    # (only the references in ${INFILE_NAME_REFS}, if set)
     #
-
     print('reading mgi id/pubmed id -> J: translation')
-    results = db.sql('select mgiID, pubmedID, jnumID from BIB_Citation_Cache where jnumID is not null', 'auto')
-    for r in results:
-        mgiRefLookup[r['mgiID']] = r['jnumID']
-        if r['pubmedID'] != '':
-            mgiRefLookup[r['pubmedID']] = r['jnumID']
-    #print(mgiRefLookup['14321840'])
+    fingerprint = ''
+    if refsFileName:
+        # the refs file is re-written by every run, so its contents are compared
+        fingerprint = cachelib.contentFingerprint(refsFileName)
+    fingerprint = fingerprint + cachelib.sqlFingerprint('''
+        select (select count(*) from BIB_Citation_Cache where jnumID is not null) as jnums,
+        (select max(modification_date) from BIB_Refs) as refs,
+        (select max(modification_date) from ACC_Accession where _MGIType_key = 1) as accs
+        ''')
+    mgiRefLookup = cachelib.loadLookup('mgiref.array', fingerprint, buildRefLookup, MGIREF_LOOKUP_VERSION)
 
     #
     # read/store object-to-Marker info
     #
     print('reading object -> marker translation using gpi file')
-    for line in gpiFile.readlines():
-        if line[:1] == '!':
-            continue
-        tokens = line[:-1].split('\t')
-        tokens2 = tokens[0].split(':')
-        if tokens2[0] in gpiSet:
-            key = tokens[0]
-            value = tokens[6].replace('MGI:MGI:', 'MGI:')
-            if key not in gpiLookup:
-                gpiLookup[key] = []
-            gpiLookup[key].append(value)
-    #print(gpiLookup)
+    fingerprint = cachelib.fileFingerprint(gpiFileName)
+    gpiLookup = cachelib.loadLookup('gpi.tuple', fingerprint, buildGPILookup, GPI_LOOKUP_VERSION)
 
     #
     # lookup file of Evidence Code Ontology using ecolib.py library
     #
     print('reading eco -> go evidence translation')
-    ecoLookupByEco, ecoLookupByEvidence = ecolib.processECO()
+    fingerprint = cachelib.fileFingerprint(os.environ['ECOFILE'])
+    ecoLookupByEco, ecoLookupByEvidence = cachelib.loadLookup('eco', fingerprint, ecolib.processECO, ECO_LOOKUP_VERSION)
 
     #
     # read/store UBERON-to-EMAPA info
     #
     print('reading uberon -> emapa translation file')
-    uberonLookup = uberonlib.processUberon() 
+    fingerprint = cachelib.fileFingerprint(os.environ['UBERONFILE']) + cachelib.sqlFingerprint('''
+        select count(*) as emapa, max(a.modification_date) as accs
+        from ACC_Accession a, VOC_Term t
+        where a._MGIType_key = 13
+        and a.preferred = 1
+        and a._Object_key = t._Term_key
+        and t._Vocab_key = 90
+        ''')
+    uberonLookup = cachelib.loadLookup('uberon', fingerprint, uberonlib.readUberonLookup, UBERON_LOOKUP_VERSION)
+    # written here, whether the lookup is saved or built
+    uberonlib.writeUberonText(uberonLookup)
 
     #
     # lookup file of GO_REF->J:
@@ -228,300 +353,363 @@ def initialize():
     print('reading mgi_user GO_')
     results = db.sql('''select login from MGI_User where login like 'GO_%' ''', 'auto')
     for r in results:
-        userLookup.append(r['login'])
+        userLookup.add(r['login'])
     #print(userLookup)
 
     return 0
 
 #
-# Purpose: Read MGI GPAD file and generate Annotation file
+# Purpose: Translate one GPAD record into an Annotation file line
+#	inferredFrom, properties : columns 7, 12 already normalised by normlib
+#	error messages are appended to errors, pubmed QC lines to pubmeds
+#	returns (assignedBy, annotation line), or None if the row is skipped
 #
-def readGPAD(gpadInFile):
+def translateGPAD(r, inferredFrom, properties, errors, pubmeds):
+
+    hasError = 0
+    line = r.line
+
+    # 1:  DB_Object_ID : without extra MGI:
+    # expect:  MGI:, PR:
+    dbobjectID = r.dbObjectID.replace('MGI:MGI:', 'MGI:')
+
+    # 1:  DB_Object_ID with fill MGI:MGI:
+    gpiobjectID = r.dbObjectID
+
+    # 2:  Negation
+    negation = r.negation
+
+    # 3:  Relation Ontology (RO) -> GO Property (roLookup)
+    qualifier = r.relation
+
+    # 4:  Ontology_Class_ID
+    goID = r.goID
+
+    # 5:  References (PMIDs) -> Jnum ID (mgiRefLookup)
+    references = r.references
+    references = references.replace('MGI:MGI:', 'MGI:')
+    references = references.replace('PMID:', '')
+
+    # 6:  Evidence_Type/ECO -> GO evidence (ecoLookupByEco)
+    evidenceCode = r.evidenceCode
+
+    # 7:  With_Or_From
+    # MGI:MGI: -> MGI:, ',' -> '|'
+    # unexpected : inconsisten uniprotkb names; see normlib.normaliseInferredFrom
+
+    # 8:  Interacting_Taxon_ID
+    taxID = r.taxID
+
+    # 9:  Annotation_Date (yyymmdd)
+    annotDate = r.annotDate
+
+    # 10: Assigned_By (GO_Central, etc.)
+    assignedBy = r.assignedBy
+
+    # 11: Annotation_Extensions (RO, BFO) -> GO Property, (roLookup) (UBERON) -> EMAPA (uberonLookup)
+    extensions = r.extensions.replace('MGI:MGI:', 'MGI:')
+
+    # 12: Annotation_Properties
+	# some properties have > 1 contributor-id=https://orcid.org/0000-0001-7476-6306|https....' or GOC:
+	# replace this by multiple 'contributor-id='; see normlib.normaliseProperties
+    #print(dbobjectID, properties)
+
     #
-    #	for each row in the GPAD file (MGIINFILE_NAME_GPAD):
+    # if non-MGI object, then add as Marker annotation and use 'gene product' as a property
+    # these are considered "isoforms" of the mouse gene
+    # grab marker from gpiLookup
+    # example: PR:Q9QWY8-2 -> MGI:1342335
+    #       properties = 'gene product=PR:Q9QWY8-2'
+    #       dbobjectID = 'MGI:1342335'
     #
-    #           if the reference does not exist in MGI (using mgiRefLookup)
-    #                   write the record to the error file (INFILE_NAME_ERROR)
-    #                   skip the row
+    #print(dbobjectID)
+    databaseID, databaseTerm = dbobjectID.split(':')
+    if databaseID in gpiSet:
+        if gpiobjectID in gpiLookup:
+            properties = 'gene product=' + dbobjectID + '|' + properties
+            dbobjectID = gpiLookup[gpiobjectID][0]
+        else:
+            errors.append('Invalid Object not in GPI file (1:DB_Object_ID): %s\n%s\n****\n' % (gpiobjectID, line))
+            hasError += 1
+            return None
+    if databaseID not in databaseIDSet:
+            errors.append('Invalid col1/databaseID not expected (1:DB_Object_ID): %s\n%s\n****\n' % (databaseID, line))
+            hasError += 1
+            return None
+
+    # start: references
+    # translate references (MGI/PMID) to J numbers (J:)
+    # use the first J: match that we find
+
+    #print(references)
+    jnumID = ""
+    jnumIDFound = 0
+    referencesTokens = references.split('|')
+    #print(referencesTokens)
+
+    for ref in referencesTokens:
+
+        # one search of mgiRefLookup (see lookuplib.py) instead of 'in' + []
+        value = mgiRefLookup.get(ref)
+        if value is not None:
+            jnumID = value
+            jnumIDFound = 1
+             
+        if ref in goRefLookup:
+            jnumID = goRefLookup[ref]
+            jnumIDFound = 1
+
+    # if reference does not exist...skip it
+    # exclude Reactome references from pubmedFile/QC
+    if jnumIDFound == 0:
+        errors.append('Invalid Reference/either no GO_REF, no pubmed id or no jnum (5:References): %s\n%s\n****\n' % (references, line))
+        if not references.startswith('Reactome'):
+            pubmeds.append(references + '\n')
+        hasError += 1
+        return None
+
+    if evidenceCode in ecoLookupByEco:
+        goEvidenceCode = ecoLookupByEco[evidenceCode]
+    else:
+        errors.append('Invalid ECO id : cannot find valid GO Evidence Code (6:Evidence_Type): %s\n%s\n****\n' % (evidenceCode, line))
+        hasError += 1
+        return None
+
+    # end: references
+
+    # start: extensions/properties
+    # for MGI, we merge the extensions & properties into MGI-properties
     #
-    #           write the record to the annotation file (INFILE_NAME)
+
+    #
+    # extensions contain things like RO/BFO which need to be translated to "occurs_in", "part_of", etc.
+    # and are added to "properties" for forwarding to the annotation loader
     #
+    if len(extensions) > 0:
+
+        # parse the extensions once; translate relations to roLookup terms
+        # and uberon ids to emapa, and re-format to use 'properties' format
+        # (which will then be re-formated to mgi-property format)
+        extensions, extensionErrors, extensionWarnings = extensionlib.translateExtensions(extensions, roLookup, uberonLookup)
+        for error in extensionErrors:
+            errors.append('%s\n%s\n****\n' % (error, line))
+            hasError += 1
+        # report error; but still process it
+        for warning in extensionWarnings:
+            errors.append('%s\n%s\n****\n' % (warning, line))
 
-    global hasError
-    global userLookup
+        if len(properties) > 0:
+            properties = extensions + '|' + properties
+        else:
+            properties = extensions
 
-    # see annotload/annotload.py for format
-    # 6:  Qualifier : null
-    # 9:  Notes : none
-    # 10: logicalDB : MGI
-    annotLine = '%s\t%s\t%s\t%s\t%s\t%s\t%s\t%s\t\tMGI\t%s\n' 
+    #
+    # if qualifier in goproperytLookup:
+    #
+    #	a) store as annotload/column 11/Property
+    #
+    #	b) append to 'properties'
+    #
+    #	for example:
+    #		go_qualifier_id=BFO:0000050
+    #		go_qualifier_term=part_of
+    #		go_qualifier_id=RO:0002327
+    #		go_qualifier_term=enables
+    #		go_qualifier_id=RO:0002331
+    #		go_qualifier_term=involved_in
+    #
+    for g in qualifier.split('|'):
+        if g in roLookup:
+            if len(properties) > 0:
+                properties = properties + '|'
+            properties = properties + 'go_qualifier_id=' + g
+            properties = properties + '|go_qualifier_term=' + roLookup[g][0]
+        else:
+            errors.append('Invalid Relation in GO-Property (3:Relation Ontology): cannot find RO:,BFO: id: %s\n%s\n****\n' % (g, line))
+            hasError += 1
 
-    print('reading MGI GPAD')
+    # set qualifier to MGI-qualifier term
+    # if RO:0002325, then MGI-qualifier = 'colocalizes_with'
+    # if RO:0002326, then MGI-qualifier = 'contributes_to'
+    if qualifier in ('RO:0002325', 'RO:0002326'):
+            qualifier = roLookup[qualifier][0]
+            if negation == 'NOT':
+                    qualifier = negation + '|' + qualifier
+    # else MGI-qualifier = input file 'negation' value
+    else:
+            qualifier = negation
+
+    if len(assignedBy) == 0:
+            errors.append('Missing Assigned By (10): \n****%s\n' % (line))
+            hasError += 1
 
-    for line in gpadInFile.readlines():
+    if hasError > 0:
+            return None
 
-        if line[0] == '!':
-            continue
+    # for evidence:
+    #	a) store as translated ECO->MGI->Evidence Code field
+    #	b) append to 'properties' as: evidence=ECO:xxxx
+    #
+    if len(properties) > 0:
+         properties = properties + '|'
+    properties = properties + 'evidence=' + evidenceCode
 
-        hasError = 0
-        tokens = line[:-1].split('\t')
+    # for taxID : append to "properties' as: Interacting taxon ID=xxxx
+    if len(taxID) > 0:
+            if len(properties) > 0:
+                    properties = properties + '|'
+            properties = properties + 'Interacting taxon ID=' + taxID
 
-        # 1:  DB_Object_ID : without extra MGI:
-        # expect:  MGI:, PR:
-        dbobjectID = tokens[0].replace('MGI:MGI:', 'MGI:')
+    #
+    # re-format to mgi-property format
+    #
+    properties = normlib.encodeProperties(properties)
 
-        # 1:  DB_Object_ID with fill MGI:MGI:
-        gpiobjectID = tokens[0]
+    # end: extensions/properties
 
-        # 2:  Negation
-        negation = tokens[1]
+    #
+    # start:  assigned by
+    #
+    # if assignedBy does not exist in MGI_User, then it is added by processUsers()
+    # for MGI, convert assignedBy -> 'GO_' + assignedBy
+    # example:  SynGO -> GO_SynGO, UniProt -> GO_UniProt 
+    # use the prefix "GO_" to the MGI_User.login/name, so that we can find the GO annotations more easily
+    #
+    if assignedBy != 'GO_Central':
+            assignedBy = 'GO_' + assignedBy
 
-        # 3:  Relation Ontology (RO) -> GO Property (roLookup)
-        qualifier = tokens[2]
+    # end:  assigned by
 
-        # 4:  Ontology_Class_ID
-        goID = tokens[3]
+    # write data to the annotation file
+    # note that the annotation load will qc duplicate annotations itself
+    # (dbobjectID, goID, goEvidenceCode, jnumID, properties, inferred-from)
+    return assignedBy, annotLine % (goID, dbobjectID, jnumID, goEvidenceCode, inferredFrom, qualifier, assignedBy, annotDate, properties)
 
-        # 5:  References (PMIDs) -> Jnum ID (mgiRefLookup)
-        references = tokens[4]
-        references = references.replace('MGI:MGI:', 'MGI:')
-        references = references.replace('PMID:', '')
+#
+# Purpose: Translate a chunk of GPAD lines
+#	returns (annotation text, error text, pubmed text, set of assignedBy)
+#	when GOLOAD_WORKERS > 1, this runs in a worker process
+#	and uses the copy of the lookups that the worker inherits at fork
+#
+def translateChunk(lines):
 
-        # 6:  Evidence_Type/ECO -> GO evidence (ecoLookupByEco)
-        evidenceCode = tokens[5]
+    annots = []
+    errors = []
+    pubmeds = []
+    assignedBySet = set()
 
-        # 7:  With_Or_From
-        inferredFrom = tokens[6]
-        inferredFrom = inferredFrom.replace('MGI:MGI:', 'MGI:')
-        inferredFrom = inferredFrom.replace(',', '|')
-        # unexpected : inconsisten uniprotkb names; remove when fixed in mgi.gpad file
-        inferredFrom = inferredFrom.replace('UniprotkB', 'UniProtKB')
-        inferredFrom = inferredFrom.replace('UniprotKB', 'UniProtKB')
-        inferredFrom = inferredFrom.replace('UniProtKb', 'UniProtKB')
-        inferredFrom = inferredFrom.replace('UniPRotKB', 'UniProtKB')
-        inferredFrom = inferredFrom.replace('UniPROtKB', 'UniProtKB')
-        inferredFrom = inferredFrom.replace('UNiProtKB', 'UniProtKB')
-        inferredFrom = inferredFrom.replace('UnIProtKB', 'UniProtKB')
+    records = list(gpadlib.readGPAD(lines))
 
-        # 8:  Interacting_Taxon_ID
-        taxID = tokens[7]
+    # normalise the With_Or_From, Annotation_Properties columns of the chunk at once
+    inferredFromColumn = normlib.normaliseInferredFromColumn([r.withFrom for r in records])
+    propertiesColumn = normlib.normalisePropertiesColumn([r.properties for r in records])
 
-        # 9:  Annotation_Date (yyymmdd)
-        annotDate = tokens[8]
+    for r, inferredFrom, properties in zip(records, inferredFromColumn, propertiesColumn):
+        result = translateGPAD(r, inferredFrom, properties, errors, pubmeds)
+        if result is not None:
+            assignedBySet.add(result[0])
+            annots.append(result[1])
 
-        # 10: Assigned_By (GO_Central, etc.)
-        assignedBy = tokens[9]
+    return ''.join(annots), ''.join(errors), ''.join(pubmeds), assignedBySet, len(records)
 
-        # 11: Annotation_Extensions (RO, BFO) -> GO Property, (roLookup) (UBERON) -> EMAPA (uberonLookup)
-        extensions = tokens[10].replace('MGI:MGI:', 'MGI:')
+#
+# Purpose: Write the translated chunk
+#
+def writeChunk(result):
 
-        # 12: Annotation_Properties
-	# some properties have > 1 contributor-id=https://orcid.org/0000-0001-7476-6306|https....' or GOC:
-	# replace this by multiple 'contributor-id=' lines
-        properties = tokens[11].replace('"','')
-        properties = properties.replace('|https:', '|contributor-id=https:')
-        properties = properties.replace('|GOC:', '|contributor-id=GOC:')
-        #print(dbobjectID, properties)
-
-        #
-        # if non-MGI object, then add as Marker annotation and use 'gene product' as a property
-        # these are considered "isoforms" of the mouse gene
-        # grab marker from gpiLookup
-        # example: PR:Q9QWY8-2 -> MGI:1342335
-        #       properties = 'gene product=PR:Q9QWY8-2'
-        #       dbobjectID = 'MGI:1342335'
-        #
-        #print(dbobjectID)
-        databaseID, databaseTerm = dbobjectID.split(':')
-        if databaseID in gpiSet:
-            if gpiobjectID in gpiLookup:
-                properties = 'gene product=' + dbobjectID + '|' + properties
-                dbobjectID = gpiLookup[gpiobjectID][0]
-            else:
-                errorFile.write('Invalid Object not in GPI file (1:DB_Object_ID): %s\n%s\n****\n' % (gpiobjectID, line))
-                hasError += 1
-                continue
-        if databaseID not in databaseIDSet:
-                errorFile.write('Invalid col1/databaseID not expected (1:DB_Object_ID): %s\n%s\n****\n' % (databaseID, line))
-                hasError += 1
-                continue
-
-        # start: references
-        # translate references (MGI/PMID) to J numbers (J:)
-        # use the first J: match that we find
-
-        #print(references)
-        jnumID = ""
-        jnumIDFound = 0
-        referencesTokens = references.split('|')
-        #print(referencesTokens)
-
-        for r in referencesTokens:
-
-            if r in mgiRefLookup:
-                jnumID = mgiRefLookup[r]
-                jnumIDFound = 1
-                 
-            if r in goRefLookup:
-                jnumID = goRefLookup[r]
-                jnumIDFound = 1
-
-        # if reference does not exist...skip it
-        # exclude Reactome references from pubmedFile/QC
-        if jnumIDFound == 0:
-            errorFile.write('Invalid Reference/either no GO_REF, no pubmed id or no jnum (5:References): %s\n%s\n****\n' % (references, line))
-            if not references.startswith('Reactome'):
-                pubmedFile.write(references + '\n')
-            hasError += 1
-            continue
+    annotText, errorText, pubmedText, assignedBySet, recordCount = result
 
-        if evidenceCode in ecoLookupByEco:
-            goEvidenceCode = ecoLookupByEco[evidenceCode]
-        else:
-            errorFile.write('Invalid ECO id : cannot find valid GO Evidence Code (6:Evidence_Type): %s\n%s\n****\n' % (evidenceCode, line))
-            hasError += 1
-            continue
-
-        # end: references
-
-        # start: extensions/properties
-        # for MGI, we merge the extensions & properties into MGI-properties
-        #
-
-        #
-        # extensions contain things like RO/BFO which need to be translated to "occurs_in", "part_of", etc.
-        # and are added to "properties" for forwarding to the annotation loader
-        #
-        if len(extensions) > 0:
-
-            # to translate uberon ids to emapa
-            extensions, errors = uberonlib.convertExtensions(extensions, uberonLookup)
-            if errors:
-                for error in errors:
-                    errorFile.write('%s\n%s\n****\n' % (error, line))
-                    hasError += 1
-
-            # unexpected quote; remove it
-            extensions = extensions.replace('"','')
-            # different delimiters; make them all the same ","
-            extensions = extensions.replace('|',',')
-
-            # translate extensions to roLookup terms
-            s1 = extensions.split(",")
-            for s in s1:
-                s2 = s.split("(")
-                roTerm = s2[0]
-                if roTerm in roLookup:
-                    extensions = extensions.replace(roTerm, roLookup[roTerm][0])
-                else:
-                    errorFile.write('Invalid Relation in GO-Property (11:Annotation_Extensions,12:Annotation_Properties): cannot find RO:,BFO: id: %s\n%s\n****\n' % (roTerm, line))
-                    # report error; but still process it
-                    #hasError += 1
-
-            # re-format to use 'properties' format
-            # (which will then be re-formated to mgi-property format)
-            extensions = extensions.replace('(', '=')
-            extensions = extensions.replace(')', '')
-            extensions = extensions.replace(',', '|')
+    # collect the assignedBy; the new MGI_User are added by processUsers()
+    assignedByLookup.update(assignedBySet)
 
-            if len(properties) > 0:
-                properties = extensions + '|' + properties
-            else:
-                properties = extensions
-
-        #
-        # if qualifier in goproperytLookup:
-        #
-        #	a) store as annotload/column 11/Property
-        #
-        #	b) append to 'properties'
-        #
-        #	for example:
-        #		go_qualifier_id=BFO:0000050
-        #		go_qualifier_term=part_of
-        #		go_qualifier_id=RO:0002327
-        #		go_qualifier_term=enables
-        #		go_qualifier_id=RO:0002331
-        #		go_qualifier_term=involved_in
-        #
-        for g in qualifier.split('|'):
-            if g in roLookup:
-                if len(properties) > 0:
-                    properties = properties + '|'
-                properties = properties + 'go_qualifier_id=' + g
-                properties = properties + '|go_qualifier_term=' + roLookup[g][0]
-            else:
-                errorFile.write('Invalid Relation in GO-Property (3:Relation Ontology): cannot find RO:,BFO: id: %s\n%s\n****\n' % (g, line))
-                hasError += 1
-
-        # set qualifier to MGI-qualifier term
-        # if RO:0002325, then MGI-qualifier = 'colocalizes_with'
-        # if RO:0002326, then MGI-qualifier = 'contributes_to'
-        if qualifier in ('RO:0002325', 'RO:0002326'):
-                qualifier = roLookup[qualifier][0]
-                if negation == 'NOT':
-                        qualifier = negation + '|' + qualifier
-        # else MGI-qualifier = input file 'negation' value
-        else:
-                qualifier = negation
+    # the GPAD records only (not the ! header lines)
+    runstats.addRows(read=recordCount, written=annotText.count('\n'))
 
-        if len(assignedBy) == 0:
-                errorFile.write('Missing Assigned By (10): \n****%s\n' % (line))
-                hasError += 1
+    annotFile.write(annotText)
+    errorFile.write(errorText)
+    pubmedFile.write(pubmedText)
 
-        if hasError > 0:
-                continue
+    return 0
 
-        # for evidence:
-        #	a) store as translated ECO->MGI->Evidence Code field
-        #	b) append to 'properties' as: evidence=ECO:xxxx
-        #
-        if len(properties) > 0:
-             properties = properties + '|'
-        properties = properties + 'evidence=' + evidenceCode
-
-        # for taxID : append to "properties' as: Interacting taxon ID=xxxx
-        if len(taxID) > 0:
-                if len(properties) > 0:
-                        properties = properties + '|'
-                properties = properties + 'Interacting taxon ID=' + taxID
-
-        #
-        # re-format to mgi-property format
-        #
-        properties = properties.replace('"', '')
-        properties = properties.replace('=', '&=&')
-        properties = properties.replace('|', '&==&')
-        properties = properties.replace('&==&&==&', '&==&')
-
-        # end: extensions/properties
-
-        #
-        # start:  assigned by
-        #
-        # if assignedBy does not exist in MGI_User, then add it
-        # for MGI, convert assignedBy -> 'GO_' + assignedBy
-        # example:  SynGO -> GO_SynGO, UniProt -> GO_UniProt 
-        # use the prefix "GO_" to the MGI_User.login/name, so that we can find the GO annotations more easily
-        #
-        if assignedBy != 'GO_Central':
-                assignedBy = 'GO_' + assignedBy
-        if assignedBy not in userLookup:
-            addSQL = '''
-                insert into MGI_User values (
-                (select max(_User_key) + 1 from MGI_User), 316353, 316350, '%s', '%s', null, null, 1000, 1000, now(), now()
-                )''' % (assignedBy, assignedBy)
-            print('adding new MGI_User:' + str(addSQL))
-            db.sql(addSQL, 'auto')
-            db.commit()
-            userLookup.append(assignedBy)
-
-        # end:  assigned by
-
-        # write data to the annotation file
-        # note that the annotation load will qc duplicate annotations itself
-        # (dbobjectID, goID, goEvidenceCode, jnumID, properties, inferred-from)
-        annotFile.write(annotLine % (goID, dbobjectID, jnumID, goEvidenceCode, inferredFrom, qualifier, assignedBy, annotDate, properties))
+#
+# Purpose: Read MGI GPAD file and generate Annotation file
+#
+def readGPAD(gpadInFile):
+    #
+    #	for each row in the GPAD file (FROM_MGIINFILE_NAME_GZ):
+    #
+    #           if the reference does not exist in MGI (using mgiRefLookup)
+    #                   write the record to the error file (INFILE_NAME_ERROR)
+    #                   skip the row
+    #
+    #           write the record to the annotation file (INFILE_NAME)
+    #
+    #	the GPAD is read in chunks of GPAD_CHUNK_SIZE lines
+    #	if GOLOAD_WORKERS > 1, the chunks are translated by a pool of worker processes;
+    #	at most 2 chunks per worker are in flight, and the results are written
+    #	in input order, so the annotation file is the same as a serial run
+    #
+
+    print('reading MGI GPAD')
+
+    chunks = gpadlib.readChunks(gpadInFile, GPAD_CHUNK_SIZE)
+
+    if workers <= 1:
+        for chunk in chunks:
+            writeChunk(translateChunk(chunk))
+        return 0
+
+    print('translating MGI GPAD using %d worker processes' % (workers))
+    pool = multiprocessing.get_context('fork').Pool(workers)
+    pending = collections.deque()
+
+    for chunk in chunks:
+        pending.append(pool.apply_async(translateChunk, (chunk,)))
+        if len(pending) >= 2 * workers:
+            writeChunk(pending.popleft().get())
+
+    while pending:
+        writeChunk(pending.popleft().get())
+
+    pool.close()
+    pool.join()
+
+    return 0
+
+#
+# Purpose: Add the MGI_User for any new assignedBy
+#
+def processUsers():
+    #
+    # the assignedBy collected from the GPAD (assignedByLookup) that do not exist
+    # in MGI_User (userLookup) are added using one insert statement and one commit
+    #
+    # the annotation loader (annotload) is run after goload.py,
+    # so the new MGI_User exist before the annotations that use them are loaded
+    #
+
+    newUsers = sorted(assignedByLookup - userLookup)
+
+    if len(newUsers) == 0:
+        print('no new MGI_User needed')
+        return 0
+
+    values = ','.join(["('%s')" % (u.replace("'", "''")) for u in newUsers])
+
+    # lock MGI_User so that max(_User_key) cannot change until the commit
+    addSQL = '''
+        lock table MGI_User in share row exclusive mode;
+        insert into MGI_User
+        select (select max(_User_key) from MGI_User) + row_number() over (order by v.login),
+                316353, 316350, v.login, v.login, null, null, 1000, 1000, now(), now()
+        from (values %s) as v(login)
+        where not exists (select 1 from MGI_User u where u.login = v.login)
+        ''' % (values)
+    print('adding new MGI_User:' + str(addSQL))
+    db.sql(addSQL, None)
+    db.commit()
+
+    userLookup.update(newUsers)
 
     return 0
 
@@ -541,12 +729,21 @@ def closeFiles():
 # main
 #
 
-if initialize() != 0:
-    sys.exit(1)
+if __name__ == '__main__':
+
+    runstats.start('goload')
+
+    with runstats.phase('initialize'):
+        if initialize() != 0:
+            sys.exit(1)
 
-if readGPAD(gpadInFile) != 0:
-    sys.exit(1)
+    with runstats.phase('readGPAD'):
+        if readGPAD(gpadInFile) != 0:
+            sys.exit(1)
 
-closeFiles()
-sys.exit(0)
+    with runstats.phase('processUsers'):
+        if processUsers() != 0:
+            sys.exit(1)
 
+    closeFiles()
+    sys.exit(0)
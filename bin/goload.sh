@@ -87,13 +87,9 @@ then
 fi
 
 #
-# copy new file from ${DATADOWNLOADS} and unzip
+# the GPAD file is read directly from ${FROM_MGIINFILE_NAME_GZ}
+# (decompressed as a stream by gpadscan.py, goload.py); no copy/gunzip is needed
 #
-echo "Copying new file from ${FROM_MGIINFILE_NAME_GZ} to ${INPUTDIR}" >> ${LOG}
-cd ${INPUTDIR}
-cp ${FROM_MGIINFILE_NAME_GZ} ${INPUTDIR}
-rm -rf ${MGIINFILE_NAME_GPAD}
-gunzip ${MGIINFILE_NAME_GZ}
 
 #
 # Source the DLA library functions.
@@ -145,10 +141,12 @@ checkStatus ${STAT} "create ${PUBREPORTDIR}/output/mgi.gpi file"
 #
 # pre-process
 #
-echo "Running pre-processing pmid" >> ${LOG}
+echo "Running pre-processing pmid (gpadscan.py)" >> ${LOG}
 cd ${INPUTDIR}
-rm -rf ${INFILE_NAME_PMID}
-cut -f5 ${MGIINFILE_NAME_GPAD} | sort | uniq | grep '^PMID' | cut -f2 -d":" > ${INFILE_NAME_PMID}
+rm -rf ${INFILE_NAME_PMID} ${INFILE_NAME_REFS}
+${PYTHON} ${GOLOAD}/bin/gpadscan.py >> ${LOG}
+STAT=$?
+checkStatus ${STAT} "${GOLOAD}/bin/gpadscan.py"
 ${PYTHON} ${GOLOAD}/bin/preprocessrefs.py ${INFILE_NAME_PMID} >> ${LOG}
 STAT=$?
 checkStatus ${STAT} "preprocessrefs.py ${INFILE_NAME_PMID}"
@@ -156,16 +154,30 @@ checkStatus ${STAT} "preprocessrefs.py ${INFILE_NAME_PMID}"
 # move to the ${OUTPUTDIR}
 cd ${OUTPUTDIR}
 
+#
+# delta mode : if GOLOAD_DELTA=true and the previous run saved its fingerprints,
+# then only the annotations that changed are deleted/loaded (see godelta.py)
+#
+DELTA=0
+if [ "${GOLOAD_DELTA}" = "true" -a -f ${DELTA_FINGERPRINT_FILE} ]
+then
+    DELTA=1
+fi
+
 #
 # run annotation load with an empty file to remove previous data
 #
-echo "Running annotation load to delete existing data (_annottype_key = 1000)" >> ${LOG}
-rm -rf ${INPUTDIR}/goload.annot
-touch ${INPUTDIR}/goload.annot
-COMMON_CONFIG_CSH=${GOLOAD}/goannotdelete.config
-${ANNOTLOADER_CSH} ${COMMON_CONFIG_CSH} go >> ${LOG}
-STAT=$?
-checkStatus ${STAT} "${ANNOTLOADER_CSH} ${COMMON_CONFIG_CSH} go"
+if [ ${DELTA} -eq 0 ]
+then
+    echo "Running annotation load to delete existing data (_annottype_key = 1000)" >> ${LOG}
+    rm -rf ${DELTA_FINGERPRINT_FILE}
+    rm -rf ${INPUTDIR}/goload.annot
+    touch ${INPUTDIR}/goload.annot
+    COMMON_CONFIG_CSH=${GOLOAD}/goannotdelete.config
+    ${ANNOTLOADER_CSH} ${COMMON_CONFIG_CSH} go >> ${LOG}
+    STAT=$?
+    checkStatus ${STAT} "${ANNOTLOADER_CSH} ${COMMON_CONFIG_CSH} go"
+fi
 
 #
 # create input file
@@ -178,22 +190,42 @@ rm -rf ${PUBMED_ERROR}.sort
 sort ${PUBMED_ERROR} | uniq > ${PUBMED_ERROR}.sort
 mv ${PUBMED_ERROR}.sort ${PUBMED_ERROR}
 
-#
-# run annotation load with new annotations
-#
-COMMON_CONFIG_CSH=${GOLOAD}/goannot.config
-echo "Running GO annotation load" >> ${LOG}
-${ANNOTLOADER_CSH} ${COMMON_CONFIG_CSH} go >> ${LOG} 
-STAT=$?
-checkStatus ${STAT} "${ANNOTLOADER_CSH} ${COMMON_CONFIG_CSH} go"
+if [ ${DELTA} -eq 1 ]
+then
+    #
+    # delete the changed/removed annotations; create the delta input file
+    #
+    echo "Running godelta.py" >> ${LOG}
+    ${PYTHON} ${GOLOAD}/bin/godelta.py >> ${LOG}
+    STAT=$?
+    checkStatus ${STAT} "${GOLOAD}/bin/godelta.py"
+
+    #
+    # run annotation load with the changed/added annotations
+    #
+    COMMON_CONFIG_CSH=${GOLOAD}/goannotdelta.config
+    echo "Running GO annotation load (delta)" >> ${LOG}
+    ${ANNOTLOADER_CSH} ${COMMON_CONFIG_CSH} go >> ${LOG} 
+    STAT=$?
+    checkStatus ${STAT} "${ANNOTLOADER_CSH} ${COMMON_CONFIG_CSH} go"
+else
+    #
+    # run annotation load with new annotations
+    #
+    COMMON_CONFIG_CSH=${GOLOAD}/goannot.config
+    echo "Running GO annotation load" >> ${LOG}
+    ${ANNOTLOADER_CSH} ${COMMON_CONFIG_CSH} go >> ${LOG} 
+    STAT=$?
+    checkStatus ${STAT} "${ANNOTLOADER_CSH} ${COMMON_CONFIG_CSH} go"
+fi
 
 #
-# run inferred-from cache
+# save the fingerprints of the annotations that are now loaded
 #
-echo "Running GO inferred-from cache load" >> ${LOG}
-${GOLOAD}/bin/inferredfrom.sh >> ${LOG} 
+echo "Running godelta.py -s" >> ${LOG}
+${PYTHON} ${GOLOAD}/bin/godelta.py -s >> ${LOG}
 STAT=$?
-checkStatus ${STAT} "${GOLOAD}/bin/inferredfrom.sh"
+checkStatus ${STAT} "${GOLOAD}/bin/godelta.py -s"
 
 #
 # run eco check
@@ -205,28 +237,14 @@ checkStatus ${STAT} "${GOLOAD}/bin/inferredfrom.sh"
 #checkStatus ${STAT} "${GOLOAD}/bin/echocheck.sh"
 
 #
-# go-tracking : add new markers; remove old markers
-#
-echo "Running go-tracking" >> ${LOG}
-${PYTHON} ${GOLOAD}/bin/gotracking.py >> ${LOG}
-STAT=$?
-checkStatus ${STAT} "${GOLOAD}/bin/gotracking.py"
-
-#
-# run go_annot_extensions_display.sh
-#
-echo "Running go_annot_extensions_display.sh" >> ${LOG}
-${GOLOAD}/bin/go_annot_extensions_display.sh
-STAT=$?
-checkStatus ${STAT} "${GOLOAD}/go_annot_extensions_display.sh"
-
-#
-# run go_isoforms_display.sh
+# run the post-load cache stages:
+#       inferredfrom.sh, gotracking.py, go_annot_extensions_display.sh, go_isoforms_display.sh
+# the stages that do not write the same tables run at the same time (see poststages.py)
 #
-echo "Running go_isoforms_display.sh" >> ${LOG}
-${GOLOAD}/bin/go_isoforms_display.sh 
+echo "Running poststages.py" >> ${LOG}
+${PYTHON} ${GOLOAD}/bin/poststages.py >> ${LOG}
 STAT=$?
-checkStatus ${STAT} "${GOLOAD}/go_isoforms_display.sh"
+checkStatus ${STAT} "${GOLOAD}/bin/poststages.py"
 
 #
 # post processing
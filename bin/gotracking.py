@@ -4,6 +4,7 @@
 #
 #       The purpose of this script is to:
 #               add GO_Tracking record for Marker if one does not exist
+#               delete GO_Tracking record for Marker if it no longer has GO annotations
 #
 # History:
 #
@@ -14,50 +15,57 @@
 
 import sys 
 import os
+import time
 import db
 
+goloadpath = os.environ['GOLOAD'] + '/lib'
+sys.path.insert(0, goloadpath)
+import runstats
+
 db.setTrace()
 
-# create new go_trackin records
+runstats.start('gotracking')
 
+#
+# add/remove go_tracking records using one statement each, in one transaction
+#
+
+# create new go_tracking records for markers that have GO annotations
+runstats.startPhase('add')
+startTime = time.time()
 results = db.sql('''
-        select distinct m._marker_key, m.symbol
+        with added as (
+        insert into GO_Tracking
+        select distinct m._marker_key, 0, null, 1001, 1001, null, now(), now()
         from mrk_marker m, voc_annot a
         where m._marker_key = a._object_key
         and a._annottype_key = 1000
         and not exists (select 1 from go_tracking g where m._marker_key = g._marker_key)
-        order by m.symbol
+        returning _marker_key
+        )
+        select count(*) as counter from added
         ''', 'auto')
+print('go_tracking added: %s (%.2f sec)' % (results[0]['counter'], time.time() - startTime))
+runstats.addRows(written=results[0]['counter'])
 
-updateSQL = ''
-for r in results:
-        key = r['_marker_key']
-        updateSQL += 'insert into GO_Tracking values(%s,0,null,1001,1001,null,now(),now());\n' % (key)
-
-if len(updateSQL) > 0:
-        #print(updateSQL)
-        db.sql(updateSQL, None)
-        db.commit()
-
-# delete go_tracking records
+# delete go_tracking records for markers that no longer have GO annotations
+runstats.startPhase('delete')
+startTime = time.time()
 results = db.sql('''
-        select m._marker_key, m.symbol, g.*
-        from mrk_marker m, go_tracking g
+        with deleted as (
+        delete from go_tracking g
+        using mrk_marker m
         where m._marker_key = g._marker_key
         and not exists (select 1 from voc_annot a
                 where m._marker_key = a._object_key
                 and a._annottype_key = 1000
         )
+        returning g._marker_key
+        )
+        select count(*) as counter from deleted
         ''', 'auto')
+print('go_tracking deleted: %s (%.2f sec)' % (results[0]['counter'], time.time() - startTime))
+runstats.addRows(written=results[0]['counter'])
 
-deleteSQL = ''
-for r in results:
-        key = r['_marker_key']
-        deleteSQL += 'delete from go_tracking where _marker_key = %s;\n' % (key)
-
-if len(deleteSQL) > 0:
-        #print(deleteSQL)
-        db.sql(deleteSQL, None)
-        db.commit()
-
+db.commit()
 
@@ -0,0 +1,158 @@
+'''
+#
+# gpadscan.py
+#
+#       The purpose of this script is to scan the MGI GPAD file once
+#       and create the input files needed before goload.py is run,
+#       and the column summaries that postprocess.sh used to build with cut|sort|uniq
+#
+#       goload.annot is still created by goload.py, because goload.py needs the
+#       J: numbers that preprocessrefs.py assigns to the pubmed ids found here
+#
+# Inputs:
+#
+#       ${FROM_MGIINFILE_NAME_GZ}  the MGI GPAD file (gzipped; read as a stream)
+#
+# Outputs:
+#
+#       ${INFILE_NAME_PMID}        the distinct pubmed ids in 5:References (input to preprocessrefs.py)
+#       ${INFILE_NAME_REFS}        the distinct 5:References ids, as goload.py looks them up in
+#                                  BIB_Citation_Cache (MGI:xxxx, pubmed id without PMID:)
+#                                  (goload.py only reads these references)
+#
+#       ${INPUTDIR}/db_object_id.error   1:  DB_Object_ID prefix (MGI, PR, etc.)
+#       ${INPUTDIR}/taxon.error          8:  Interacting_Taxon_ID
+#       ${INPUTDIR}/assignedby.error     10: Assigned_By
+#       ${INPUTDIR}/uniprotkb.error      1:  DB_Object_ID that are UniProtKB ids
+#
+#       each column summary contains the distinct values, sorted (as cut|sort|uniq did)
+#
+# Usage:
+#       gpadscan.py
+#
+# History:
+#
+'''
+
+import sys
+import os
+
+goloadpath = os.environ['GOLOAD'] + '/lib'
+sys.path.insert(0, goloadpath)
+import gpadlib
+
+# GPAD file
+gpadInFileName = os.environ['FROM_MGIINFILE_NAME_GZ']
+
+# pubmed id file
+pmidFileName = os.environ['INFILE_NAME_PMID']
+
+# reference id file
+refsFileName = os.environ['INFILE_NAME_REFS']
+
+# column summary files
+inputDir = os.environ['INPUTDIR']
+dbObjectFileName = inputDir + '/db_object_id.error'
+taxonFileName = inputDir + '/taxon.error'
+assignedByFileName = inputDir + '/assignedby.error'
+uniprotFileName = inputDir + '/uniprotkb.error'
+
+# the distinct values found during the scan
+pmidSet = set()
+refSet = set()
+dbObjectSet = set()
+taxonSet = set()
+assignedBySet = set()
+uniprotSet = set()
+
+#
+# Purpose: read the GPAD file once and collect the distinct pubmed ids/column values
+#
+def scanGPAD():
+
+    print('scanning MGI GPAD: ', gpadInFileName)
+
+    gpadInFile = gpadlib.openGPAD(gpadInFileName)
+
+    for r in gpadlib.readGPAD(gpadInFile):
+
+        # 1:  DB_Object_ID : MGI:MGI:xxxx, PR:xxxx, UniProtKB:xxxx
+        dbObjectSet.add(r.dbObjectID.split(':')[0])
+        if r.dbObjectID.find('UniProtKB') >= 0:
+            uniprotSet.add(r.dbObjectID)
+
+        # 5:  References : PMID:xxxx|GO_REF:xxxx|...
+        for ref in r.references.split('|'):
+            if ref.startswith('PMID:') and len(ref) > 5:
+                pmidSet.add(ref[5:])
+
+        # the same translation as goload.py/translateGPAD()
+        for ref in r.references.replace('MGI:MGI:', 'MGI:').replace('PMID:', '').split('|'):
+            if ref != '' and not ref.startswith('GO_REF:'):
+                refSet.add(ref)
+
+        # 8:  Interacting_Taxon_ID
+        taxonSet.add(r.taxID)
+
+        # 10: Assigned_By
+        assignedBySet.add(r.assignedBy)
+
+    gpadInFile.close()
+
+    return 0
+
+#
+# Purpose: write the distinct pubmed ids to the pmid file
+#
+def writePMID():
+
+    pmidFile = open(pmidFileName, 'w')
+    for p in sorted(pmidSet):
+        pmidFile.write(p + '\n')
+    pmidFile.close()
+
+    print('pubmed ids: ', len(pmidSet))
+
+    return 0
+
+#
+# Purpose: write the distinct reference ids to the refs file
+#
+def writeRefs():
+
+    refsFile = open(refsFileName, 'w')
+    for r in sorted(refSet):
+        refsFile.write(r + '\n')
+    refsFile.close()
+
+    print('reference ids: ', len(refSet))
+
+    return 0
+
+#
+# Purpose: write a column summary (the distinct values) sorted by value
+#
+def writeValues(fileName, values):
+
+    valueFile = open(fileName, 'w')
+    for value in sorted(values):
+        valueFile.write(value + '\n')
+    valueFile.close()
+
+    return 0
+
+#
+# main
+#
+
+if scanGPAD() != 0:
+    sys.exit(1)
+
+writePMID()
+writeRefs()
+writeValues(dbObjectFileName, dbObjectSet)
+writeValues(taxonFileName, taxonSet)
+writeValues(assignedByFileName, assignedBySet)
+writeValues(uniprotFileName, uniprotSet)
+sys.exit(0)
+
@@ -5,6 +5,10 @@
 # Usage:
 #	inferredFrom.py
 #
+# if ${INFERREDFROM_INCREMENTAL} = true, then only the accession ids of the
+# GO/Annotation/Evidence rows that were added/removed since the last run are
+# deleted/added; the accession ids of unchanged evidence rows are kept
+#
 # History
 #
 # 11/27/2023    lec
@@ -20,6 +24,10 @@ import db
 import loadlib
 import accessionlib
 
+goloadpath = os.environ['GOLOAD'] + '/lib'
+sys.path.insert(0, goloadpath)
+import runstats
+
 db.setTrace()
 
 COLDL = '|'
@@ -30,13 +38,18 @@ outputDir = os.environ['OUTPUTDIR']
 accTable = 'ACC_Accession'
 accFile = ''            # file descriptor
 accFileName = outputDir + '/' + accTable + '.bcp'
+incremental = os.environ.get('INFERREDFROM_INCREMENTAL', 'false') == 'true'
 accKey = 0              # ACC_Accession._Accession_key
+errorFileName = outputDir + '/inferredfrom.error'
 mgiTypeKey = 25         # Annotation Evidence
 loaddate = loadlib.loaddate
 createdByKey = 1001
 
 eiErrorStatus = '%s     %s     %s     %s\n'
 
+# number of rows fetched from the inferred-from cursor at a time
+FETCH_SIZE = 50000
+
 # maps provider prefix to logical database key
 # using lowercase
 providerMap = {
@@ -150,6 +163,46 @@ def preCache():
         db.sql('delete from ACC_Accession a using toCheck d where d._Accession_key = a._Accession_key', None)
         db.commit()
 
+def preCacheIncremental():
+        #
+        # delete the accession ids of GO/Annotation/Evidence rows that no longer exist
+        # store the GO/Annotation/Evidence rows that do not have accession ids yet
+        # (changedEvidence) so that processCache() only adds those
+        #
+
+        results = db.sql('''
+                with deleted as (
+                delete from ACC_Accession a
+                where a._MGIType_key = 25
+                and a._CreatedBy_key = %s
+                and not exists (select 1 from VOC_Evidence e where a._Object_key = e._AnnotEvidence_key)
+                returning a._Object_key
+                )
+                select count(distinct _Object_key) as counter from deleted
+                ''' % (createdByKey), 'auto')
+        print('removed evidence: ', results[0]['counter'])
+
+        cmd = '''select e._AnnotEvidence_key
+                into temporary table changedEvidence
+                from VOC_Annot v, VOC_Evidence e, MGI_User u
+                where v._AnnotType_key = 1000
+                and v._Annot_key = e._Annot_key
+                and e.inferredFrom is not null
+                and e._CreatedBy_key = u._User_key
+                and u.login like \'GO_%\'
+                and not exists (select 1 from ACC_Accession a
+                        where a._MGIType_key = 25
+                        and a._Object_key = e._AnnotEvidence_key
+                        )
+                '''
+        db.sql(cmd, None)
+        db.sql('create index idx2 on changedEvidence(_AnnotEvidence_key)', None)
+
+        results = db.sql('select count(*) as counter from changedEvidence', 'auto')
+        print('added evidence: ', results[0]['counter'])
+
+        db.commit()
+
 def processCache():
         #
         # process the inferred-from data from the vocabulary table
@@ -159,7 +212,9 @@ def processCache():
         global accKey
 
         # retrieve GO/Annotation/Evidence/inferredFrom which contain accession ids
+        # using a server-side cursor, FETCH_SIZE rows at a time
         cmd = '''
+                declare inferredFromCursor no scroll cursor for
                 select e._AnnotEvidence_key, e.inferredFrom, m.symbol, ta.accID as goID, c.pubmedID
                 from VOC_Annot a, VOC_Evidence e, MRK_Marker m, ACC_Accession ta, MGI_User u, BIB_Citation_Cache c
                 where a._AnnotType_key = 1000 
@@ -175,87 +230,107 @@ def processCache():
                 and u.login like \'GO_%\'
                 '''
 
-        results = db.sql(cmd, 'auto')
-        eiErrors = ''
-
-        for r in results:
-                key = r['_AnnotEvidence_key']
-                inferredFrom = r['inferredFrom']
-                symbol = r['symbol']
-                goID = r['goID']
-                if r['pubmedID'] != None:
-                    pubmedID = r['pubmedID']
-                else:
-                    pubmedID = ""
-
-                #
-                # the accession ids are separated by '|' or none
-                # split them up into a list
-                #
-
-                if inferredFrom.find('|') >= 0:
-                        allAccIDs = inferredFrom.split('|')
-                else:
-                        allAccIDs = [inferredFrom]
-
-                #
-                # for each accession id in the list of this marker...
-                #
-
-                for accID in allAccIDs:
-
-                        try:
-                                if accID == '':
-                                    continue
-
-                                # MGI, GO, RGD, PR IDs are stored
-                                # with the MGI:,  GO: and RGD: prefixes
-                                # for all others, we do not store the ##: part
-
-                                fullAccID = accID
-                                tokens = accID.split(':')
-                                provider = tokens[0].lower()
-                                accIDPart = tokens[1]
-
-                                if accIDPart == '':
-                                        eiErrors = eiErrors + eiErrorStatus % (symbol, goID, fullAccID, pubmedID)
+        if incremental:
+                cmd = cmd + 'and exists (select 1 from changedEvidence x where x._AnnotEvidence_key = e._AnnotEvidence_key)'
+
+        db.sql(cmd, None)
+        eiErrors = []
+        rows = 0
+
+        while True:
+
+            results = db.sql('fetch forward %d from inferredFromCursor' % (FETCH_SIZE), 'auto')
+            if len(results) == 0:
+                break
+
+            rows += len(results)
+            print('inferred-from rows: ', rows)
+
+            for r in results:
+                    key = r['_AnnotEvidence_key']
+                    inferredFrom = r['inferredFrom']
+                    symbol = r['symbol']
+                    goID = r['goID']
+                    if r['pubmedID'] != None:
+                        pubmedID = r['pubmedID']
+                    else:
+                        pubmedID = ""
+
+                    #
+                    # the accession ids are separated by '|' or none
+                    # split them up into a list
+                    #
+
+                    if inferredFrom.find('|') >= 0:
+                            allAccIDs = inferredFrom.split('|')
+                    else:
+                            allAccIDs = [inferredFrom]
+
+                    #
+                    # for each accession id in the list of this marker...
+                    #
+
+                    for accID in allAccIDs:
+
+                            try:
+                                    if accID == '':
                                         continue
 
-                                if provider not in ['mgi', 'go', 'rgd', 'pr']:
-                                        accID = accIDPart
+                                    # MGI, GO, RGD, PR IDs are stored
+                                    # with the MGI:,  GO: and RGD: prefixes
+                                    # for all others, we do not store the ##: part
 
-                                if provider in providerIgnore:
-                                        # just skip it
-                                        #print 'skip: ', provider
-                                        continue
+                                    fullAccID = accID
+                                    tokens = accID.split(':')
+                                    provider = tokens[0].lower()
+                                    accIDPart = tokens[1]
+
+                                    if accIDPart == '':
+                                            eiErrors.append(eiErrorStatus % (symbol, goID, fullAccID, pubmedID))
+                                            continue
 
-                                # for EMBL ids, check if accession id is valid
+                                    if provider not in ['mgi', 'go', 'rgd', 'pr']:
+                                            accID = accIDPart
 
-                                if provider == 'embl':
-                                        embl_result1 = embl_re1.match(accID)
-                                        embl_result2 = embl_re2.match(accID)
-                                        if embl_result1 is None and embl_result2 is None:
-                                                eiErrors = eiErrors + eiErrorStatus % (symbol, goID, fullAccID, pubmedID)
-                                                continue
+                                    if provider in providerIgnore:
+                                            # just skip it
+                                            #print 'skip: ', provider
+                                            continue
 
-                                (prefixPart, numericPart) = accessionlib.split_accnum(accID)
-                                if numericPart == None:
-                                        numericPart = ''
-                                accFile.write('%s|%s|%s|%s|%s|%d|25|1|1|%s|%s|%s|%s\n' \
-                                        % (accKey, accID, prefixPart, numericPart, providerMap[provider], key, 
-                                                createdByKey, createdByKey, loaddate, loaddate))
-                                accKey = accKey + 1
+                                    # for EMBL ids, check if accession id is valid
 
-                        except Exception as e:
-                                #print(e)
-                                eiErrors = eiErrors + eiErrorStatus % (symbol, goID, fullAccID, pubmedID)
+                                    if provider == 'embl':
+                                            embl_result1 = embl_re1.match(accID)
+                                            embl_result2 = embl_re2.match(accID)
+                                            if embl_result1 is None and embl_result2 is None:
+                                                    eiErrors.append(eiErrorStatus % (symbol, goID, fullAccID, pubmedID))
+                                                    continue
 
-        if eiErrors != '':
-                print('\nThe following errors exist in the inferred-from text:\n\n' + eiErrors)
+                                    (prefixPart, numericPart) = accessionlib.split_accnum(accID)
+                                    if numericPart == None:
+                                            numericPart = ''
+                                    accFile.write('%s|%s|%s|%s|%s|%d|25|1|1|%s|%s|%s|%s\n' \
+                                            % (accKey, accID, prefixPart, numericPart, providerMap[provider], key, 
+                                                    createdByKey, createdByKey, loaddate, loaddate))
+                                    accKey = accKey + 1
+
+                            except Exception as e:
+                                    #print(e)
+                                    eiErrors.append(eiErrorStatus % (symbol, goID, fullAccID, pubmedID))
+
+        db.sql('close inferredFromCursor', None)
 
         # close the bcp file
         accFile.close()
 
+        # write out the checking errors
+        errorFile = open(errorFileName, 'w')
+        errorFile.write(''.join(eiErrors))
+        errorFile.close()
+
+        if len(eiErrors) > 0:
+                print('\nThe following errors exist in the inferred-from text (%s):\n\n' % (errorFileName) + ''.join(eiErrors))
+
         # insert the new data
         db.bcp(accFileName, 'ACC_Accession', delimiter='|')
         db.commit()
@@ -265,8 +340,19 @@ def processCache():
 # Main Routine
 #
 
-init()
-preCache()
-processCache()
+runstats.start('inferredfrom')
+
+with runstats.phase('init'):
+        init()
+
+with runstats.phase('preCache'):
+        if incremental:
+                preCacheIncremental()
+        else:
+                preCache()
+
+with runstats.phase('processCache'):
+        processCache()
+
 exit(0)
 
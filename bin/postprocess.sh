@@ -3,6 +3,9 @@
 #
 # grep unique errors and store in seperate error files to make it a little easier to see
 #
+# db_object_id.error, taxon.error, assignedby.error, uniprotkb.error
+# are created by gpadscan.py during its single pass over the GPAD file
+#
 # Invalid Object not in GPI file (1:DB_Object_ID): 
 # Invalid col1/databaseID not expected (1:DB_Object_ID): 
 # Invalid Reference/either no GO_REF, no pubmed id or no jnum (5:References): 
@@ -25,15 +28,6 @@ cd ${INPUTDIR}
 #select login from mgi_user where login like 'GO_%' order by login;
 #EOSQL
 
-rm -rf db_object_id.error
-cut -f1 MOUSE-mod.gpad | cut -f1 -d":" | sort | uniq > db_object_id.error
-
-rm -rf taxon.error
-cut -f8 MOUSE-mod.gpad | sort | uniq > taxon.error
-
-rm -rf assignedby.error
-cut -f10 MOUSE-mod.gpad | sort | uniq > assignedby.error
-
 rm -rf invalidobject.error
 grep "Invalid Object" goload.error | sort | uniq > invalidobject.error
 
@@ -50,6 +44,3 @@ rm -rf uberon.error
 grep "uberon id not found" goload.error | sort | uniq > uberon.error
 grep "uberon id has" goload.error | sort | uniq >> uberon.error
 
-rm -rf uniprotkb.error
-cut -f1 MOUSE-mod.gpad | grep UniProtKB | sort | uniq > uniprotkb.error
-
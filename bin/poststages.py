@@ -0,0 +1,71 @@
+'''
+#
+# poststages.py
+#
+#       The purpose of this script is to run the cache stages that follow
+#       the annotation load (see goload.sh)
+#
+#       each stage declares the tables it reads and writes;
+#       stages that do not share a written table run at the same time:
+#
+#               inferredfrom.sh                 writes ACC_Accession (_MGIType_key = 25)
+#               gotracking.py                   writes GO_Tracking
+#               go_annot_extensions_display.sh  writes MGI_Note (1045), mgi_note_seq
+#               go_isoforms_display.sh          writes MGI_Note (1046), mgi_note_seq
+#
+#       both display stages take keys from mgi_note_seq (nextval/setval),
+#       so they run one after the other, in the order listed
+#
+#       at most ${GOLOAD_STAGE_WORKERS} stages run at the same time
+#       (1 = run the stages in order, as goload.sh did)
+#
+# Inputs:
+#
+#       the annotations loaded by annotload
+#
+# Outputs:
+#
+#       the output of each stage, and its status
+#       exit status 0 if all stages succeeded, else 1
+#
+# Usage:
+#       poststages.py
+#
+# History:
+#
+'''
+
+import sys
+import os
+
+goloadpath = os.environ['GOLOAD'] + '/lib'
+sys.path.insert(0, goloadpath)
+import stagelib
+
+goload = os.environ['GOLOAD']
+python = os.environ['PYTHON']
+workers = int(os.environ.get('GOLOAD_STAGE_WORKERS', '1'))
+
+annotTables = ['VOC_Annot', 'VOC_Evidence', 'VOC_Evidence_Property', 'MRK_Marker']
+
+stages = [
+    stagelib.Stage('inferredfrom.sh',
+        goload + '/bin/inferredfrom.sh',
+        annotTables + ['BIB_Citation_Cache', 'ACC_Accession (13)'],
+        ['ACC_Accession (25)']),
+    stagelib.Stage('gotracking.py',
+        python + ' ' + goload + '/bin/gotracking.py',
+        annotTables,
+        ['GO_Tracking']),
+    stagelib.Stage('go_annot_extensions_display.sh',
+        goload + '/bin/go_annot_extensions_display.sh',
+        annotTables + ['ACC_Accession (13)', 'ACC_Accession (2)', 'ACC_ActualDB'],
+        ['MGI_Note (1045)', 'mgi_note_seq']),
+    stagelib.Stage('go_isoforms_display.sh',
+        goload + '/bin/go_isoforms_display.sh',
+        annotTables + ['ACC_ActualDB'],
+        ['MGI_Note (1046)', 'mgi_note_seq']),
+]
+
+sys.exit(stagelib.runStages(stages, workers))
+
@@ -20,6 +20,10 @@
 #               if pubmedid exists in MGI and relevance = keep and no Jnumber then
 #                       add Jnumber
 #
+#       the pubmedids are loaded into a temp table and matched using one query;
+#       the relevance, jnumber and bib_citation_cache changes are each one
+#       statement over the matched references (temp table goRefs)
+#
 # History:
 #
 # lec   06/30/2022
@@ -31,62 +35,105 @@ import sys
 import os
 import db
 
+goloadpath = os.environ['GOLOAD'] + '/lib'
+sys.path.insert(0, goloadpath)
+import runstats
+
 # only turn on when debugging
 db.setTrace()
 
+# number of pubmed ids per insert statement
+BATCH_SIZE = 1000
+
 #
 # Main
 #
 
 print('\nRunning pre-procesing pmid: ', sys.argv[1])
 
+runstats.start('preprocessrefs')
+runstats.startPhase('loadPMID')
+
 # read input file & add quotes for SQL query
 inFile = open(sys.argv[1], 'r')
 pubmedids = []
-for line in inFile.readlines():
-        p = "'" + line[:-1] + "'"
-        pubmedids.append(p)
+for line in inFile:
+        p = line.strip()
+        if p != '':
+                pubmedids.append("('" + p.replace("'", "''") + "')")
 inFile.close()
 
-relevanceSQL = ""
-jnumSQL = ""
-
-for i in pubmedids:
-    # select where jnumid is null ; includes relevance = keep and discard
-    cmd = '''
-    select _refs_key, _relevance_key, pubmedid
-    from bib_citation_cache
-    where pubmedid in (%s)
-    and jnumid is null
-    ''' % i
-    #''' % ','.join(pubmedids)
-
-    results = db.sql(cmd, 'auto')
-    for r in results:
-        refsKey = r['_refs_key']
-        relevanceKey = r['_relevance_key']
-
-        # if 'discard', then add 'keep'
-        if relevanceKey == 70594666:
-            print('setting relevance = keep for: ', r['pubmedid'])
-            relevanceSQL += "\nselect * from BIB_keepWFRelevance(%s,1000);" % (refsKey);
-
-        # always add jnum and update bib_citation_cache
-        print('adding jnum for: ', r['pubmedid'])
-        jnumSQL += "\nselect * from ACC_assignJ(1000,%s);" % (refsKey)
-        jnumSQL += "\nselect * from BIB_reloadCache (%s);" % (refsKey)
-
-if len(relevanceSQL) > 0:
-       #print(relevanceSQL)
-       db.sql(relevanceSQL, None)
+print('pubmed ids: ', len(pubmedids))
+runstats.addRows(read=len(pubmedids))
+
+#
+# load the pubmed ids into a temp table
+#
+# batched inserts, not copy: db.sql() runs one statement on its cursor and cannot
+# send copy data (copy from stdin), and db.bcp() copies from its own psql session,
+# which does not see this session's temp table
+#
+db.sql('create temporary table goPMID (pubmedid text)', None)
+for i in range(0, len(pubmedids), BATCH_SIZE):
+    db.sql('insert into goPMID values %s' % (','.join(pubmedids[i:i + BATCH_SIZE])), None)
+db.sql('create index idx_goPMID on goPMID(pubmedid)', None)
+db.sql('analyze goPMID', None)
+
+runstats.startPhase('selectRefs')
+
+# select where jnumid is null ; includes relevance = keep and discard
+db.sql('''
+    select c._refs_key, c._relevance_key, c.pubmedid
+    into temporary table goRefs
+    from goPMID p, bib_citation_cache c
+    where p.pubmedid = c.pubmedid
+    and c.jnumid is null
+    ''', None)
+
+results = db.sql('select _refs_key, _relevance_key, pubmedid from goRefs order by pubmedid', 'auto')
+
+relevanceCount = 0
+for r in results:
+    # if 'discard', then add 'keep'
+    if r['_relevance_key'] == 70594666:
+        print('setting relevance = keep for: ', r['pubmedid'])
+        relevanceCount += 1
+    # always add jnum and update bib_citation_cache
+    print('adding jnum for: ', r['pubmedid'])
+
+runstats.startPhase('updateRefs')
+
+#
+# each step is one statement over the goRefs temp table,
+# so the statement size does not grow with the number of references
+#
+
+if relevanceCount > 0:
+    db.sql('''
+        select BIB_keepWFRelevance(r._refs_key, 1000)
+        from goRefs r
+        where r._relevance_key = 70594666
+        ''', None)
+    print('relevance: ', relevanceCount)
 else:
-       print('no relevance changes needed')
+    print('no relevance changes needed')
+
+if len(results) > 0:
+    # assign the J: in pubmed id order
+    # the order by is on the statement that calls ACC_assignJ (a volatile function),
+    # so that it is called after the sort, one row at a time, in that order
+    db.sql('''
+        select ACC_assignJ(1000, r._refs_key)
+        from goRefs r
+        order by r.pubmedid
+        ''', None)
+    print('jnum: ', len(results))
 
-if len(jnumSQL) > 0:
-#       #print(jnumSQL)
-       db.sql(jnumSQL, None)
+    # rebuild the bib_citation_cache rows so that goload.py finds the new J:
+    db.sql('select BIB_reloadCache(r._refs_key) from goRefs r', None)
+    print('bib_citation_cache: ', len(results))
 else:
-       print('no jnum changes needed')
+    print('no jnum changes needed')
 
 db.commit()
 
@@ -0,0 +1,117 @@
+'''
+#
+# cachelib.py
+#
+# Input:
+#
+# ${LOOKUPCACHEDIR} : the directory where the lookups are saved
+#	if not set, the lookups are always built from their source
+#
+# Output:
+#
+# a lookup (python dictionary, etc.) saved in ${LOOKUPCACHEDIR}/<name>.cache,
+# along with the fingerprint of the source it was built from
+#
+# to call from goload.py:
+#	lookup = cachelib.loadLookup('gpi', cachelib.fileFingerprint(fileName), buildFunction, version)
+#
+# What it will do:
+#	if the saved lookup exists and its version & fingerprint match, return the saved lookup
+#	else call buildFunction(), save the new lookup & version/fingerprint, and return it
+#
+#	version is the format of the lookup: change it when buildFunction() or the class of
+#	the lookup changes, so that a lookup saved by the old code is not used
+#	a saved lookup that cannot be unpickled (i.e. a class that no longer exists/has changed)
+#	is re-built
+#
+# fingerprints:
+#	fileFingerprint(fileName) : file name/size/modification time
+#	contentFingerprint(fileName) : a hash of the sorted lines of a file, for a file
+#		that is re-written by every run (i.e. ${INFILE_NAME_REFS})
+#	sqlFingerprint(cmd) : the results of a query, i.e. a count(*)/max(modification_date)
+#
+'''
+
+import os
+import pickle
+import hashlib
+import db
+
+cacheDir = os.environ.get('LOOKUPCACHEDIR', '')
+
+#
+# Purpose: return the fingerprint of a file
+#
+def fileFingerprint(fileName):
+
+    s = os.stat(fileName)
+    return '%s|%s|%s' % (fileName, s.st_size, s.st_mtime_ns)
+
+#
+# Purpose: return the fingerprint of the contents of a file (in any line order)
+#
+def contentFingerprint(fileName):
+
+    f = open(fileName, 'r')
+    lines = sorted([line.strip() for line in f])
+    f.close()
+
+    h = hashlib.sha1()
+    for line in lines:
+        h.update(line.encode('utf-8'))
+        h.update(b'\n')
+
+    return '%s|%s' % (fileName, h.hexdigest())
+
+#
+# Purpose: return the fingerprint of a query, i.e. count(*), max(modification_date)
+#
+def sqlFingerprint(cmd):
+
+    results = db.sql(cmd, 'auto')
+    return '|'.join([str(sorted(r.items())) for r in results])
+
+#
+# Purpose: return the saved lookup if its version/fingerprint match, else build & save it
+#
+def loadLookup(name, fingerprint, buildFunction, version=1):
+
+    if cacheDir == '':
+        return buildFunction()
+
+    cacheFileName = cacheDir + '/' + name + '.cache'
+    fingerprint = 'version %s|%s' % (version, fingerprint)
+
+    try:
+        cacheFile = open(cacheFileName, 'rb')
+        try:
+            savedFingerprint = pickle.load(cacheFile)
+            if savedFingerprint == fingerprint:
+                lookup = pickle.load(cacheFile)
+                print('using saved lookup: ' + cacheFileName)
+                return lookup
+        finally:
+            cacheFile.close()
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+    except (AttributeError, ImportError, TypeError) as e:
+        print('could not read saved lookup: ' + cacheFileName + ' ' + str(e))
+
+    print('building lookup: ' + name)
+    lookup = buildFunction()
+
+    # write to a temporary file first, so that an interrupted run
+    # does not leave a partial lookup behind
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        tmpFileName = cacheFileName + '.tmp'
+        cacheFile = open(tmpFileName, 'wb')
+        pickle.dump(fingerprint, cacheFile, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(lookup, cacheFile, pickle.HIGHEST_PROTOCOL)
+        cacheFile.close()
+        os.replace(tmpFileName, cacheFileName)
+    except OSError as e:
+        print('could not save lookup: ' + cacheFileName + ' ' + str(e))
+
+    return lookup
+
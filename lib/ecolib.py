@@ -45,7 +45,7 @@ def processECO():
 
     oboFile = open(oboFileName, 'r')
 
-    for line in oboFile.readlines():
+    for line in oboFile:
 
         if line[0] == '#':
             continue
@@ -0,0 +1,154 @@
+'''
+#
+# extensionlib.py
+#
+# Input:
+#
+# the annotation extensions from a gpad file, column 11
+#
+#	relation(filler),relation(filler)|relation(filler)
+#
+#	',' : the relations are all true (and)
+#	'|' : a new group of relations (or)
+#
+# Output:
+#
+# the extensions in the MGI properties format
+#
+#	property=filler|property=filler|property=filler
+#
+#	relation (RO/BFO) -> GO Property (roLookup)
+#	filler UBERON: -> EMAPA: (uberonLookup)
+#
+# to call from goload.py:
+#	properties, errors, warnings = extensionlib.translateExtensions(extensions, roLookup, uberonLookup)
+#
+# What it will do:
+#	parseExtensions() : reads the extensions once and returns a list of groups,
+#		each group is a list of (relation, filler)
+#	renderExtensions() : translates each (relation, filler) and returns the properties
+#
+#	errors : UBERON id not found or has > 1 EMAPA id; the annotation should be skipped
+#	warnings : relation not found in roLookup; the relation is kept as is
+#
+'''
+
+import uberonlib
+
+UBERON_PREFIX = 'UBERON:'
+
+RELATION_MISSING_ERROR = 'Invalid Relation in GO-Property (11:Annotation_Extensions,12:Annotation_Properties): cannot find RO:,BFO: id: %s'
+
+#
+# Purpose: Parse the extensions into a list of groups of (relation, filler)
+#	quotes are ignored
+#	a relation without a filler is returned as (relation, None)
+#	empty relations (i.e. 'a(b),,c(d)') are skipped
+#
+def parseExtensions(extensions):
+
+    groups = []
+    group = []
+    relation = []
+    filler = None
+    depth = 0
+
+    for c in extensions:
+
+        if c == '"':
+            continue
+
+        if depth > 0:
+            if c == ')':
+                depth -= 1
+                if depth == 0:
+                    continue
+            elif c == '(':
+                depth += 1
+            filler.append(c)
+
+        elif c == '(':
+            depth = 1
+            filler = []
+
+        elif c == ',' or c == '|':
+            addRelation(group, relation, filler)
+            relation = []
+            filler = None
+            if c == '|' and group:
+                groups.append(group)
+                group = []
+
+        else:
+            relation.append(c)
+
+    addRelation(group, relation, filler)
+    if group:
+        groups.append(group)
+
+    return groups
+
+#
+# Purpose: Add (relation, filler) to the group
+#
+def addRelation(group, relation, filler):
+
+    relation = ''.join(relation).strip()
+
+    if filler is not None:
+        filler = ''.join(filler).strip()
+
+    if relation == '' and not filler:
+        return
+
+    group.append((relation, filler))
+
+#
+# Purpose: Translate a parsed extension into the MGI properties format
+#	returns properties, errors, warnings
+#
+def renderExtensions(groups, roLookup={}, uberonLookup={}):
+
+    properties = []
+    errors = []
+    warnings = []
+
+    for group in groups:
+
+        for relation, filler in group:
+
+            # translate uberon ids to emapa
+            if filler is not None and filler.startswith(UBERON_PREFIX):
+                if filler in uberonLookup:
+                    u = uberonLookup[filler]
+                    # found > 1 emapa
+                    if len(u) > 1:
+                        errors.append(uberonlib.UBERON_MAPPING_MULTIPLES_ERROR % (filler, str(u)))
+                    else:
+                        filler = u[0]
+                # did not find uberon id
+                else:
+                    errors.append(uberonlib.UBERON_MAPPING_MISSING_ERROR % (filler))
+
+            # translate relation to roLookup term
+            if relation in roLookup:
+                relation = roLookup[relation][0]
+            else:
+                # report error; but still process it
+                warnings.append(RELATION_MISSING_ERROR % (relation))
+
+            if filler is None:
+                properties.append(relation)
+            else:
+                properties.append(relation + '=' + filler)
+
+    return '|'.join(properties), errors, warnings
+
+#
+# Purpose: Parse and translate the extensions
+#	returns properties, errors, warnings
+#
+def translateExtensions(extensions, roLookup={}, uberonLookup={}):
+
+    return renderExtensions(parseExtensions(extensions), roLookup, uberonLookup)
+
@@ -0,0 +1,120 @@
+'''
+#
+# gpadlib.py
+#
+# Input:
+#
+# ${FROM_MGIINFILE_NAME_GZ} : the GPAD 2.0 file from GO Central (gzipped or not)
+# ${GPIFILE} : the mgi.gpi file
+#
+# Output:
+#
+# generators that read the GPAD/GPI files lazily, one row at a time,
+# so that the whole file is never held in memory
+#
+# to call from goload.py:
+#	gpadInFile = gpadlib.openGPAD(gpadInFileName)
+#	for r in gpadlib.readGPAD(gpadInFile):
+#		r.dbObjectID, r.references, ..., r.line
+#
+#	for chunk in gpadlib.readChunks(gpadInFile, 10000):
+#		for r in gpadlib.readGPAD(chunk):
+#
+#	for r in gpadlib.readGPI(gpiFile):
+#		r.dbObjectID, r.parentObjectID
+#
+'''
+
+import collections
+import gzip
+import itertools
+
+GPAD_COLUMNS = 12
+
+#
+# a GPAD row
+# line = the original line, used for error reporting
+#
+GPADRecord = collections.namedtuple('GPADRecord', [
+        'dbObjectID',           # 1:  DB_Object_ID
+        'negation',             # 2:  Negation
+        'relation',             # 3:  Relation Ontology (RO)
+        'goID',                 # 4:  Ontology_Class_ID
+        'references',           # 5:  References
+        'evidenceCode',         # 6:  Evidence_Type/ECO
+        'withFrom',             # 7:  With_Or_From
+        'taxID',                # 8:  Interacting_Taxon_ID
+        'annotDate',            # 9:  Annotation_Date
+        'assignedBy',           # 10: Assigned_By
+        'extensions',           # 11: Annotation_Extensions
+        'properties',           # 12: Annotation_Properties
+        'line',
+        ])
+
+#
+# a GPI row
+# only the columns used by the loads are kept
+#
+GPIRecord = collections.namedtuple('GPIRecord', [
+        'dbObjectID',           # 1:  DB_Object_ID
+        'parentObjectID',       # 7:  Parent_Object_ID
+        ])
+
+#
+# Purpose: open a GPAD/GPI file for reading
+#	*.gz files are decompressed as they are read; there is no need to gunzip to disk
+#
+def openGPAD(fileName):
+
+    if fileName.endswith('.gz'):
+        return gzip.open(fileName, 'rt')
+
+    return open(fileName, 'r')
+
+#
+# Purpose: yield the data rows of a tab-delimited file, skipping comments/blank lines
+#
+def readRows(inFile, comment='!'):
+
+    for line in inFile:
+
+        row = line.rstrip('\r\n')
+
+        if row == '' or row[0] == comment:
+            continue
+
+        yield line, row.split('\t')
+
+#
+# Purpose: yield a GPADRecord for each data row of the GPAD file
+#
+def readGPAD(gpadFile):
+
+    for line, tokens in readRows(gpadFile):
+
+        # pad short rows; trailing empty columns may be missing
+        if len(tokens) < GPAD_COLUMNS:
+            tokens.extend([''] * (GPAD_COLUMNS - len(tokens)))
+
+        yield GPADRecord._make(tokens[:GPAD_COLUMNS] + [line])
+
+#
+# Purpose: yield a GPIRecord for each data row of the GPI file
+#
+def readGPI(gpiFile):
+
+    for line, tokens in readRows(gpiFile):
+        yield GPIRecord(tokens[0], tokens[6])
+
+#
+# Purpose: yield lists of (at most) chunkSize lines from the file
+#	each list can be passed to readGPAD()
+#
+def readChunks(inFile, chunkSize):
+
+    while True:
+        chunk = list(itertools.islice(inFile, chunkSize))
+        if not chunk:
+            break
+        yield chunk
+
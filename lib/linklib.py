@@ -0,0 +1,114 @@
+'''
+#
+# linklib.py
+#
+# Input:
+#
+# the link rules of a display cache: [(id prefix, kind, argument)]
+# the {acc_actualdb.name : url} map (queryProviderLinkMap()); the url contains @@@@
+#
+# Output:
+#
+# the MGI note tag (\\Link(url|display|), \\GO(...), etc.) of an id
+#
+# to call from go_annot_extensions_display.py, go_isoforms_display.py:
+#	links = linklib.buildLinks(LINK_RULES, providerLinkMap)
+#	value = linklib.renderLink(links, value, accid, term)
+# or, with a bounded LRU cache (see lib/memolib.py):
+#	render = linklib.memoRenderLink(links)
+#	value = render(value, accid, term)
+#
+# What it will do:
+#	buildLinks() returns one dispatch table keyed by the lower-cased id prefix (go, mgi, pr, etc.)
+#	with each provider url split on @@@@ once
+#	renderLink() finds the rule of an id with one dictionary lookup;
+#	ids without a rule (or whose provider is not in the map) are returned as is
+#	memoRenderLink() renders each (id, accid, term) once, while it stays in the cache
+#
+# kinds:
+#	DETAIL		link to the MGI detail page (argument = GO, EMAPA, Marker)
+#			only if the id is in MGI (accid is not None); display = term
+#	PROVIDER	provider url (argument = actual db name) of the id without its prefix; display = id
+#	PROVIDER_OBO	provider url (argument = actual db name) of the id with ':' -> '_'; display = term
+#	OBO		OBO purl of the id with ':' -> '_'; display = id
+#
+'''
+
+import functools
+import memolib
+
+DETAIL = 'detail'
+PROVIDER = 'provider'
+PROVIDER_OBO = 'provider_obo'
+OBO = 'obo'
+
+OBO_URL = 'https://purl.obolibrary.org/obo/@@@@'
+
+URL_VALUE = '@@@@'
+
+#
+# Purpose: return an MGI note tag string
+#
+def makeNoteTag(url, display, type='Link'):
+
+    return '\\\\%s(%s|%s|)' % (type, url, display)
+
+#
+# Purpose: return the dispatch table {lower-cased prefix : (kind, argument, url parts)}
+#
+def buildLinks(rules, providerLinkMap={}):
+
+    links = {}
+
+    for prefix, kind, argument in rules:
+
+        urlParts = None
+
+        if kind in (PROVIDER, PROVIDER_OBO):
+            if argument not in providerLinkMap:
+                continue
+            urlParts = providerLinkMap[argument].split(URL_VALUE)
+
+        elif kind == OBO:
+            urlParts = OBO_URL.split(URL_VALUE)
+
+        links[prefix.lower()] = (kind, argument, urlParts)
+
+    return links
+
+#
+# Purpose: return the display value (note tag) of an id
+#
+def renderLink(links, value, accid=None, term=None):
+
+    i = value.find(':')
+    if i < 0:
+        return value
+
+    link = links.get(value[:i].lower())
+    if link is None:
+        return value
+
+    kind, argument, urlParts = link
+
+    if kind == DETAIL:
+        if accid is None:
+            return value
+        return makeNoteTag(value, term, argument)
+
+    if kind == PROVIDER:
+        return makeNoteTag(value[i + 1:].join(urlParts), value)
+
+    if kind == PROVIDER_OBO:
+        return makeNoteTag(value.replace(':', '_').join(urlParts), term)
+
+    # OBO
+    return makeNoteTag(value.replace(':', '_').join(urlParts), value)
+
+#
+# Purpose: return renderLink() of one dispatch table, with a bounded LRU cache
+#
+def memoRenderLink(links, maxsize=memolib.MAXSIZE):
+
+    return memolib.Memo('renderLink', functools.partial(renderLink, links), maxsize)
+
@@ -0,0 +1,147 @@
+'''
+#
+# lookuplib.py
+#
+# Input:
+#
+# (reference id, J: id) pairs from BIB_Citation_Cache, where reference id is
+# an MGI id (MGI:#####) or a pubmed id (#####)
+#
+# Output:
+#
+# a read-only mapping of reference id -> J: id that uses much less memory than a dictionary:
+#	the numeric part of the MGI ids, pubmed ids and J: ids are stored in sorted
+#	integer arrays (8 bytes per id) instead of 2 python strings per id
+#	ids that are not numeric are kept in a small dictionary (with interned strings)
+#
+# to call from goload.py:
+#	lookup = lookuplib.RefLookup(pairs)
+#	if ref in lookup:
+#		jnumID = lookup[ref]
+#
+# the lookup can be pickled (see cachelib.py)
+#
+'''
+
+import sys
+import array
+import bisect
+import collections.abc
+
+MGI_PREFIX = 'MGI:'
+JNUM_PREFIX = 'J:'
+
+#
+# Purpose: return the integer of a numeric id, or None
+#	ids with leading zeros are not numeric, so that str(int(id)) == id
+#
+def numericID(value):
+
+    if value.isdigit() and value[0] != '0' and value.isascii():
+        return int(value)
+
+    return None
+
+class RefLookup(collections.abc.Mapping):
+    '''
+    reference id (MGI:#####, pubmed id) -> J: id
+    '''
+
+    def __init__(self, pairs):
+
+        mgiPairs = []
+        pubmedPairs = []
+        self.other = {}
+
+        # if a reference id occurs > 1, the last J: is used (as with a dictionary)
+        for key, jnumID in pairs:
+
+            jnum = None
+            if jnumID.startswith(JNUM_PREFIX):
+                jnum = numericID(jnumID[len(JNUM_PREFIX):])
+
+            if key.startswith(MGI_PREFIX):
+                n = numericID(key[len(MGI_PREFIX):])
+                target = mgiPairs
+            else:
+                n = numericID(key)
+                target = pubmedPairs
+
+            if n is None or jnum is None:
+                self.other[sys.intern(key)] = sys.intern(jnumID)
+                continue
+
+            target.append((n, jnum))
+
+        self.mgiIDs, self.mgiJnums = self.toArrays(mgiPairs)
+        self.pubmedIDs, self.pubmedJnums = self.toArrays(pubmedPairs)
+
+    #
+    # Purpose: return the sorted, unique ids and their J: numbers as 2 integer arrays
+    #
+    @staticmethod
+    def toArrays(pairs):
+
+        # sort is stable, so the last J: of a duplicate id is the last in its run
+        pairs.sort(key=lambda p: p[0])
+
+        ids = array.array('q')
+        jnums = array.array('q')
+        for n, jnum in pairs:
+            if len(ids) > 0 and ids[-1] == n:
+                jnums[-1] = jnum
+            else:
+                ids.append(n)
+                jnums.append(jnum)
+
+        return ids, jnums
+
+    #
+    # Purpose: return the index of the id in ids, or -1
+    #
+    @staticmethod
+    def find(ids, n):
+
+        i = bisect.bisect_left(ids, n)
+        if i < len(ids) and ids[i] == n:
+            return i
+
+        return -1
+
+    def __getitem__(self, key):
+
+        if key.startswith(MGI_PREFIX):
+            n = numericID(key[len(MGI_PREFIX):])
+            ids, jnums = self.mgiIDs, self.mgiJnums
+        else:
+            n = numericID(key)
+            ids, jnums = self.pubmedIDs, self.pubmedJnums
+
+        if n is not None:
+            i = self.find(ids, n)
+            if i >= 0:
+                return JNUM_PREFIX + str(jnums[i])
+
+        return self.other[key]
+
+    def __contains__(self, key):
+
+        try:
+            self[key]
+        except KeyError:
+            return False
+
+        return True
+
+    def __iter__(self):
+
+        for n in self.mgiIDs:
+            yield MGI_PREFIX + str(n)
+        for n in self.pubmedIDs:
+            yield str(n)
+        yield from self.other
+
+    def __len__(self):
+
+        return len(self.mgiIDs) + len(self.pubmedIDs) + len(self.other)
+
@@ -0,0 +1,76 @@
+'''
+#
+# memolib.py
+#
+# Input:
+#
+# a function of hashable arguments (Processor.processValue(), linklib.renderLink(), etc.)
+#
+# Output:
+#
+# the function with a bounded LRU cache in front of it:
+#	a value that repeats (common GO/EMAPA/CL ids, PR isoforms, etc.) is processed once
+#	while it stays in the cache
+#
+# to call from go_annot_extensions_display.py, go_isoforms_display.py:
+#	processValue = memolib.Memo('processValue', extensionProcessor.processValue)
+#	value = processValue(value)
+#	...
+#	processValue.report()
+#
+# What it will do:
+#	the cache holds at most MAXSIZE results (${MEMO_MAXSIZE}); the least recently used is dropped
+#	report() prints calls, hits, misses, cache size and the hit rate (to the script log)
+#
+#	the cached result is returned to every caller, so it must not be modified
+#
+'''
+
+import os
+import functools
+
+MAXSIZE = int(os.environ.get('MEMO_MAXSIZE', 100000))
+
+class Memo(object):
+    '''
+    bounded LRU cache of a function
+    '''
+
+    def __init__(self, name, function, maxsize=MAXSIZE):
+
+        self.name = name
+        self.function = functools.lru_cache(maxsize=maxsize)(function)
+
+    def __call__(self, *args):
+
+        return self.function(*args)
+
+    #
+    # Purpose: return the (hits, misses, maxsize, currsize) of the cache
+    #
+    def info(self):
+
+        return self.function.cache_info()
+
+    #
+    # Purpose: return the fraction of the calls that were found in the cache
+    #
+    def hitRate(self):
+
+        info = self.info()
+        calls = info.hits + info.misses
+        if calls == 0:
+            return 0.0
+
+        return info.hits / calls
+
+    #
+    # Purpose: print the cache counters
+    #
+    def report(self):
+
+        info = self.info()
+        print('%s: calls: %d, hits: %d, misses: %d, size: %d/%d, hit rate: %.1f%%' % \
+            (self.name, info.hits + info.misses, info.hits, info.misses,
+             info.currsize, info.maxsize, 100 * self.hitRate()))
+
@@ -0,0 +1,107 @@
+'''
+#
+# normlib.py
+#
+# Input:
+#
+# the With_Or_From (column 7) and Annotation_Properties (column 12) values from a gpad file
+#
+# Output:
+#
+# the normalised values, using one compiled regex/translate table per column
+# instead of one str.replace() per known variant
+#
+# to call from goload.py:
+#	inferredFromColumn = normlib.normaliseInferredFromColumn([r.withFrom for r in records])
+#	propertiesColumn = normlib.normalisePropertiesColumn([r.properties for r in records])
+#	properties = normlib.encodeProperties(properties)
+#
+# the *Column() functions normalise a whole chunk of values with one regex pass
+#
+'''
+
+import re
+
+# values are joined by this delimiter for the *Column() functions
+# (gpad values never contain a newline)
+COLUMN_DELIMITER = '\n'
+
+#
+# With_Or_From
+#	MGI:MGI: -> MGI:
+#	,        -> |
+#	unexpected : inconsistent uniprotkb names -> UniProtKB; remove when fixed in mgi.gpad file
+#
+INFERREDFROM_REPLACE = {
+        'MGI:MGI:' : 'MGI:',
+        ',' : '|',
+        'UniprotkB' : 'UniProtKB',
+        'UniprotKB' : 'UniProtKB',
+        'UniProtKb' : 'UniProtKB',
+        'UniPRotKB' : 'UniProtKB',
+        'UniPROtKB' : 'UniProtKB',
+        'UNiProtKB' : 'UniProtKB',
+        'UnIProtKB' : 'UniProtKB',
+}
+inferredFrom_re = re.compile('|'.join([re.escape(k) for k in INFERREDFROM_REPLACE]))
+
+def inferredFromReplace(m):
+    return INFERREDFROM_REPLACE[m.group(0)]
+
+#
+# Annotation_Properties
+#	some properties have > 1 contributor-id=https://orcid.org/0000-0001-7476-6306|https....' or GOC:
+#	replace this by multiple 'contributor-id=' lines
+#
+properties_re = re.compile(r'\|(?=https:|GOC:)')
+
+#
+# mgi-property format
+#	remove "
+#	= -> &=&
+#	| -> &==&
+#
+PROPERTIES_ENCODE = str.maketrans({'"' : None, '=' : '&=&', '|' : '&==&'})
+
+#
+# Purpose: Normalise one With_Or_From value
+#
+def normaliseInferredFrom(value):
+
+    return inferredFrom_re.sub(inferredFromReplace, value)
+
+#
+# Purpose: Normalise a list of With_Or_From values
+#
+def normaliseInferredFromColumn(values):
+
+    if len(values) == 0:
+        return []
+
+    return normaliseInferredFrom(COLUMN_DELIMITER.join(values)).split(COLUMN_DELIMITER)
+
+#
+# Purpose: Normalise one Annotation_Properties value
+#
+def normaliseProperties(value):
+
+    return properties_re.sub('|contributor-id=', value.replace('"', ''))
+
+#
+# Purpose: Normalise a list of Annotation_Properties values
+#
+def normalisePropertiesColumn(values):
+
+    if len(values) == 0:
+        return []
+
+    return normaliseProperties(COLUMN_DELIMITER.join(values)).split(COLUMN_DELIMITER)
+
+#
+# Purpose: Re-format properties to mgi-property format
+#	empty properties (||) are removed
+#
+def encodeProperties(value):
+
+    return value.translate(PROPERTIES_ENCODE).replace('&==&&==&', '&==&')
+
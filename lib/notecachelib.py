@@ -0,0 +1,236 @@
+'''
+#
+# notecachelib.py
+#
+# Input:
+#
+# the notes a display cache should contain (the transformed properties),
+# ordered by _evidenceproperty_key (a list or a generator):
+#	[{'_evidenceproperty_key', 'displayNote'}, ...]
+# the MGI_Note rows of the note type (1045, 1046, etc.)
+#
+# Output:
+#
+# the MGI_Note rows that changed are updated, the rows that are no longer needed
+# are deleted, and the new notes are passed to writeNotes() in batches of BATCH_SIZE,
+# while the properties are being read; writeNotes() assigns the _note_keys and calls insertNotes()
+#
+# to call from go_annot_extensions_display.py, go_isoforms_display.py:
+#	notecachelib.refreshNotes(DISPLAY_NOTE_TYPE_KEY, properties, writeNotes)
+#
+# What it will do:
+#	the current notes are read with a cursor ordered by _object_key and merge-joined with
+#	the properties, so memory does not grow with the number of notes
+#	the notes are compared per object (_evidenceproperty_key); an object may have > 1 note
+#	an existing note with a different text is updated (its _note_key is kept)
+#	the notes that are the same are not touched
+#	the updates/deletes use one statement each (over a temp table)
+#	all statements run on the db connection, so the caller commits (or rolls back) the refresh as one
+#
+#	displayNote is in bcp (copy text) format, i.e. '\\Link(...)' is stored as '\Link(...)';
+#	it is un-escaped (noteValue()) before it is compared with/updated in MGI_Note
+#
+'''
+
+import re
+import itertools
+import db
+
+# number of rows per insert statement
+BATCH_SIZE = 1000
+
+# number of current notes read from the cursor at a time
+FETCH_SIZE = 50000
+
+# use mgd_dbo
+MODIFIEDBY_KEY = 1001
+
+# copy text format escapes (see postgres COPY)
+copy_re = re.compile(r'\\(.)', re.S)
+COPY_ESCAPES = {'b' : '\b', 'f' : '\f', 'n' : '\n', 'r' : '\r', 't' : '\t', 'v' : '\v'}
+
+#
+# Purpose: return the note as stored in MGI_Note from its bcp (copy text) format
+#
+def noteValue(displayNote):
+
+    return copy_re.sub(lambda m: COPY_ESCAPES.get(m.group(1), m.group(1)), displayNote)
+
+#
+# Purpose: yield the current notes of the note type, one object at a time, ordered by _object_key:
+#	(objectKey, [(note, noteKey)])
+#	the notes are read in batches of FETCH_SIZE (server-side cursor)
+#
+def queryNotes(noteTypeKey):
+
+    db.sql('''
+        declare noteCursor no scroll cursor for
+        select _note_key, _object_key, note
+        from mgi_note
+        where _notetype_key = %d
+        order by _object_key
+        ''' % (noteTypeKey), None)
+
+    def fetchNotes():
+        while True:
+            results = db.sql('fetch forward %d from noteCursor' % (FETCH_SIZE), 'auto')
+            if len(results) == 0:
+                break
+            yield from results
+
+    for key, group in itertools.groupby(fetchNotes(), key=lambda r: r['_object_key']):
+        yield key, [(r['note'], r['_note_key']) for r in group]
+
+    db.sql('close noteCursor', None)
+
+#
+# Purpose: compare the current notes of one object with its properties
+#	adds to inserts (properties), updates [(noteKey, note)], deletes [noteKey]
+#	the notes that are on both sides are not touched; the note keys of the
+#	other old notes are re-used (updated) for the other new notes
+#
+def diffObject(properties, oldNotes, inserts, updates, deletes):
+
+    # the old note keys by note (an object may have the same note > 1)
+    oldKeys = {}
+    for note, noteKey in sorted(oldNotes):
+        oldKeys.setdefault(note, []).append(noteKey)
+
+    newNotes = []
+    for p in properties:
+        value = noteValue(p['displayNote'])
+        if oldKeys.get(value):
+            oldKeys[value].pop(0)
+        else:
+            newNotes.append((value, p))
+
+    newNotes.sort(key=lambda n: n[0])
+    oldNotes = sorted([(note, noteKey) for note in oldKeys for noteKey in oldKeys[note]])
+
+    for (value, p), (note, noteKey) in zip(newNotes, oldNotes):
+        updates.append((noteKey, value))
+
+    inserts.extend([p for value, p in newNotes[len(oldNotes):]])
+    deletes.extend([noteKey for note, noteKey in oldNotes[len(newNotes):]])
+
+#
+# Purpose: load rows into a new temp table using batched inserts
+#
+def loadTempTable(tableName, columns, rows):
+
+    db.sql('create temporary table %s (%s)' % (tableName, columns), None)
+
+    for i in range(0, len(rows), BATCH_SIZE):
+        values = []
+        for row in rows[i:i + BATCH_SIZE]:
+            values.append('(%s)' % ','.join([sqlValue(v) for v in row]))
+        db.sql('insert into %s values %s' % (tableName, ','.join(values)), None)
+
+#
+# Purpose: return a value as an sql literal
+#
+def sqlValue(value):
+
+    if isinstance(value, int):
+        return str(value)
+
+    return "'%s'" % (str(value).replace("'", "''"))
+
+#
+# Purpose: insert MGI_Note rows using batched inserts
+#	notes : [[_note_key, _object_key, _mgitype_key, _notetype_key, note,
+#		_createdby_key, _modifiedby_key, creation_date, modification_date]]
+#	note is as stored (see noteValue())
+#
+def insertNotes(notes):
+
+    for i in range(0, len(notes), BATCH_SIZE):
+        values = []
+        for row in notes[i:i + BATCH_SIZE]:
+            values.append('(%s)' % ','.join([sqlValue(v) for v in row]))
+        db.sql('''
+            insert into mgi_note (_note_key, _object_key, _mgitype_key, _notetype_key, note,
+                _createdby_key, _modifiedby_key, creation_date, modification_date)
+            values %s
+            ''' % (','.join(values)), None)
+
+#
+# Purpose: update/delete the notes
+#
+def applyNotes(updates, deletes):
+
+    if len(deletes) > 0:
+        loadTempTable('noteDeletes', '_note_key int', [(k,) for k in deletes])
+        db.sql('delete from mgi_note n using noteDeletes d where n._note_key = d._note_key', None)
+        db.sql('drop table noteDeletes', None)
+
+    if len(updates) > 0:
+        loadTempTable('noteUpdates', '_note_key int, note text', updates)
+        db.sql('''
+            update mgi_note n
+            set note = u.note, _modifiedby_key = %d, modification_date = now()
+            from noteUpdates u
+            where n._note_key = u._note_key
+            ''' % (MODIFIEDBY_KEY), None)
+        db.sql('drop table noteUpdates', None)
+
+#
+# Purpose: refresh the notes of the note type
+#	properties must be ordered by _evidenceproperty_key
+#	the properties are merge-joined with the current notes (ordered by _object_key),
+#	so neither is held in memory
+#	the properties that need a new note are passed to writeNotes()
+#
+def refreshNotes(noteTypeKey, properties, writeNotes):
+
+    current = queryNotes(noteTypeKey)
+    old = next(current, None)
+
+    lastKey = None
+    inserts = []
+    updates = []
+    deletes = []
+    count = 0
+    insertCount = 0
+
+    for key, group in itertools.groupby(properties, key=lambda p: p['_evidenceproperty_key']):
+
+        if lastKey is not None and key <= lastKey:
+            raise ValueError('properties are not ordered by _evidenceproperty_key: %s' % (key))
+        lastKey = key
+
+        # the objects before this one no longer have notes
+        while old is not None and old[0] < key:
+            deletes.extend([noteKey for note, noteKey in old[1]])
+            old = next(current, None)
+
+        oldNotes = []
+        if old is not None and old[0] == key:
+            oldNotes = old[1]
+            old = next(current, None)
+
+        group = list(group)
+        count += len(group)
+        diffObject(group, oldNotes, inserts, updates, deletes)
+
+        if len(inserts) >= BATCH_SIZE:
+            writeNotes(inserts)
+            insertCount += len(inserts)
+            inserts = []
+
+    if len(inserts) > 0:
+        writeNotes(inserts)
+        insertCount += len(inserts)
+
+    # the objects after the last property no longer have notes
+    while old is not None:
+        deletes.extend([noteKey for note, noteKey in old[1]])
+        old = next(current, None)
+
+    print('notes: %d, unchanged: %d, new: %d, updated: %d, deleted: %d' % \
+        (count, count - insertCount - len(updates), insertCount, len(updates), len(deletes)))
+
+    applyNotes(updates, deletes)
+
+    return 0
+
@@ -0,0 +1,254 @@
+'''
+#
+# runstats.py
+#
+# Input:
+#
+# the named phases of a script (initialize, readGPAD, etc.)
+#
+# Output:
+#
+# for each phase:
+#	wall time, cpu time (user + system, including waited-for child processes),
+#	peak RSS so far (KB), rows read/written, db query count/time
+#
+#	${LOGDIR}/<script>.stats.json : the report of this run (archived with the logs)
+#	${RUNSTATS_HISTORY}           : one csv line per phase is appended for each run,
+#	                                so that the runs can be compared over time
+#	a summary is also printed to stdout (the script log)
+#
+# to call from goload.py:
+#	runstats.start('goload')
+#	with runstats.phase('readGPAD'):
+#		...
+#		runstats.addRows(read=len(lines), written=len(annots))
+#
+# to call from a script without functions (preprocessrefs.py, etc.):
+#	runstats.start('preprocessrefs')
+#	runstats.startPhase('loadPMID')
+#	...
+#	runstats.startPhase('assignJ')	(ends the previous phase)
+#
+# What it will do:
+#	start() wraps db.sql() and db.bcp() so that every query is counted/timed;
+#	the rows returned by db.sql() are counted as read, the rows in a bcp file as written
+#	the report is written when the script exits (sys.exit() or the end of the script)
+#	queries/rows outside of a phase are only counted in the run total
+#
+'''
+
+import sys
+import os
+import time
+import json
+import resource
+import atexit
+import contextlib
+import db
+
+logDir = os.environ.get('LOGDIR', '')
+historyFileName = os.environ.get('RUNSTATS_HISTORY', '')
+
+HISTORY_COLUMNS = ['runDate', 'script', 'phase', 'wallSeconds', 'cpuSeconds', 'maxRSS',
+        'rowsRead', 'rowsWritten', 'queries', 'querySeconds']
+
+scriptName = None
+runDate = None
+phases = []
+total = None
+current = None
+
+#
+# Purpose: return the cpu seconds used by this process and its waited-for children
+#
+def cpuTime():
+
+    s = resource.getrusage(resource.RUSAGE_SELF)
+    c = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return s.ru_utime + s.ru_stime + c.ru_utime + c.ru_stime
+
+#
+# Purpose: return the peak RSS (KB) of this process or its largest child
+#
+def maxRSS():
+
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+#
+# Purpose: return a new phase
+#
+def newPhase(name):
+
+    return {
+        'phase' : name,
+        'wallSeconds' : time.time(),
+        'cpuSeconds' : cpuTime(),
+        'maxRSS' : 0,
+        'rowsRead' : 0,
+        'rowsWritten' : 0,
+        'queries' : 0,
+        'querySeconds' : 0.0,
+        }
+
+#
+# Purpose: end a phase; the start times become elapsed times
+#
+def endPhase(p):
+
+    p['wallSeconds'] = round(time.time() - p['wallSeconds'], 3)
+    p['cpuSeconds'] = round(cpuTime() - p['cpuSeconds'], 3)
+    p['querySeconds'] = round(p['querySeconds'], 3)
+    p['maxRSS'] = maxRSS()
+
+#
+# Purpose: add to the counters of the current phase and the run total
+#
+def add(key, value):
+
+    total[key] += value
+    if current is not None:
+        current[key] += value
+
+#
+# Purpose: add rows read/written by the script (files, etc.)
+#	the rows returned by db.sql()/in a db.bcp() file are already counted; do not add them again
+#
+def addRows(read=0, written=0):
+
+    if total is None:
+        return
+
+    add('rowsRead', read)
+    add('rowsWritten', written)
+
+#
+# Purpose: db.sql() counted/timed
+#
+def sql(*args, **kwargs):
+
+    startTime = time.time()
+    results = dbSQL(*args, **kwargs)
+    add('querySeconds', time.time() - startTime)
+    add('queries', 1)
+    if isinstance(results, list):
+        add('rowsRead', len(results))
+    return results
+
+#
+# Purpose: db.bcp() counted/timed
+#
+def bcp(bcpFile, *args, **kwargs):
+
+    startTime = time.time()
+    results = dbBCP(bcpFile, *args, **kwargs)
+    add('querySeconds', time.time() - startTime)
+    add('queries', 1)
+    with open(bcpFile, 'r') as f:
+        add('rowsWritten', sum(1 for line in f))
+    return results
+
+#
+# Purpose: start counting for the script
+#
+def start(name):
+
+    global scriptName, runDate, total
+    global dbSQL, dbBCP
+
+    if total is not None:
+        return
+
+    scriptName = name
+    runDate = time.strftime('%Y-%m-%d %H:%M:%S')
+    total = newPhase('total')
+
+    dbSQL = db.sql
+    dbBCP = db.bcp
+    db.sql = sql
+    db.bcp = bcp
+
+    atexit.register(finish)
+
+#
+# Purpose: count a named phase
+#
+@contextlib.contextmanager
+def phase(name):
+
+    global current
+
+    if total is None:
+        yield
+        return
+
+    previous = current
+    current = newPhase(name)
+    try:
+        yield
+    finally:
+        endPhase(current)
+        phases.append(current)
+        current = previous
+
+#
+# Purpose: end the current phase (if any) and start a new phase
+#
+def startPhase(name):
+
+    global current
+
+    if total is None:
+        return
+
+    if current is not None:
+        endPhase(current)
+        phases.append(current)
+
+    current = newPhase(name)
+
+#
+# Purpose: write the report of the run
+#
+def finish():
+
+    global total, current
+
+    if total is None:
+        return
+
+    if current is not None:
+        endPhase(current)
+        phases.append(current)
+        current = None
+
+    endPhase(total)
+    rows = phases + [total]
+
+    print('\nrun statistics: %s' % (scriptName))
+    for p in rows:
+        print('%-25s wall %10.1fs cpu %10.1fs maxRSS %10dKB read %10d written %10d queries %8d (%.1fs)' % \
+            (p['phase'], p['wallSeconds'], p['cpuSeconds'], p['maxRSS'],
+             p['rowsRead'], p['rowsWritten'], p['queries'], p['querySeconds']))
+    sys.stdout.flush()
+
+    try:
+        if logDir:
+            with open(os.path.join(logDir, scriptName + '.stats.json'), 'w') as f:
+                json.dump({'script' : scriptName, 'runDate' : runDate, 'phases' : rows}, f, indent=2)
+
+        if historyFileName:
+            lines = []
+            if not os.path.exists(historyFileName):
+                lines.append(','.join(HISTORY_COLUMNS) + '\n')
+            for p in rows:
+                p = dict(p, runDate=runDate, script=scriptName)
+                lines.append(','.join([str(p[c]) for c in HISTORY_COLUMNS]) + '\n')
+            # one write, so the lines of scripts that run at the same time are not mixed
+            with open(historyFileName, 'a') as f:
+                f.write(''.join(lines))
+    except OSError as e:
+        print('could not write run statistics: %s' % (e))
+
+    total = None
+
@@ -0,0 +1,112 @@
+'''
+#
+# stagelib.py
+#
+# Runs a list of load stages (shell commands), running the stages that do not
+# depend on each other at the same time
+#
+# Input:
+#
+# a list of Stage(name, command, reads, writes)
+#	reads/writes : the tables (or other resources) the stage reads/writes
+#
+# Output:
+#
+# the output of each stage is printed when the stage has finished
+# returns 0 if all stages succeeded, else 1
+#
+# to call from poststages.py:
+#	stagelib.runStages(stages, workers)
+#
+# What it will do:
+#	two stages depend on each other if one writes what the other reads or writes;
+#	a stage starts when every earlier stage it depends on has finished
+#	at most "workers" stages run at the same time
+#	if a stage fails, no new stages are started
+#
+'''
+
+import collections
+import concurrent.futures
+import subprocess
+import time
+
+Stage = collections.namedtuple('Stage', ['name', 'command', 'reads', 'writes'])
+
+#
+# Purpose: return true if the stages cannot run at the same time
+#
+def conflicts(s1, s2):
+
+    if set(s1.writes) & (set(s2.writes) | set(s2.reads)):
+        return True
+
+    if set(s2.writes) & set(s1.reads):
+        return True
+
+    return False
+
+#
+# Purpose: run one stage; returns (returncode, output, elapsed seconds)
+#
+def runStage(stage):
+
+    startTime = time.time()
+    p = subprocess.run(stage.command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                universal_newlines=True)
+    return p.returncode, p.stdout, time.time() - startTime
+
+#
+# Purpose: run the stages
+#
+def runStages(stages, workers=1):
+
+    # the earlier stages each stage must wait for
+    waitFor = {}
+    for i, s in enumerate(stages):
+        waitFor[s.name] = set([e.name for e in stages[:i] if conflicts(e, s)])
+
+    pending = list(stages)
+    finished = set()
+    running = {}
+    failed = []
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    while pending or running:
+
+        # start the stages that are ready
+        if not failed:
+            for s in list(pending):
+                if len(running) >= workers:
+                    break
+                if waitFor[s.name] <= finished:
+                    print('%s : starting %s' % (time.strftime('%c'), s.name))
+                    running[executor.submit(runStage, s)] = s
+                    pending.remove(s)
+        elif not running:
+            break
+
+        done, notDone = concurrent.futures.wait(list(running), return_when=concurrent.futures.FIRST_COMPLETED)
+
+        for future in done:
+            s = running.pop(future)
+            returncode, output, elapsed = future.result()
+            print(output)
+            if returncode == 0:
+                print('%s : %s completed successfully (%.1f sec)' % (time.strftime('%c'), s.name, elapsed))
+                finished.add(s.name)
+            else:
+                print('%s : %s failed (status %s)' % (time.strftime('%c'), s.name, returncode))
+                failed.append(s.name)
+
+    executor.shutdown()
+
+    for s in pending:
+        print('%s : not run' % (s.name))
+
+    if failed or pending:
+        return 1
+
+    return 0
+
@@ -36,23 +36,57 @@ uberonLookup = {}
 UBERON_MAPPING_MULTIPLES_ERROR = "uberon id has > 1 emapa : %s\t%s"
 UBERON_MAPPING_MISSING_ERROR = "uberon id not found or missing emapa id: %s" 
 
-def processUberon():
+#
+# Purpose: Reads an obo file, one stanza at a time
+#	yields (stanza type, {tag : [values]}), i.e.
+#	('Term', {'id' : ['UBERON:0000955'], 'xref' : ['EMAPA:16894', 'FMA:50801', ...], ...})
+#	the header (before the first stanza) is skipped
+#	trailing modifiers {...} and ! comments are removed from the values
+#
+def readOBOStanzas(oboFile):
 
-    uberonFileName = os.environ['UBERONFILE']
-    uberonTextFileName = os.environ['UBERONTEXTFILE']
-    uberonFile = open(uberonFileName, 'r')
-    uberonTextFile = open(uberonTextFileName, 'w')
+    stanzaType = None
+    tags = {}
 
-    #
-    # read/store UBERON-to-EMAPA info
-    #
+    for line in oboFile:
 
-    print('reading uberon -> emapa translation file')
+        line = line.strip()
 
-    #
-    # read/store list of primary EMAPA ids
-    #
-    primaryEmapa = []
+        if line == '' or line[0] == '!':
+            continue
+
+        if line[0] == '[' and line[-1] == ']':
+            if stanzaType is not None:
+                yield stanzaType, tags
+            stanzaType = line[1:-1]
+            tags = {}
+            continue
+
+        # header
+        if stanzaType is None:
+            continue
+
+        tag, sep, value = line.partition(':')
+        if sep == '':
+            continue
+
+        value = value.split(' !')[0]
+        if value.endswith('}') and value.find(' {') >= 0:
+            value = value[:value.rfind(' {')]
+
+        if tag not in tags:
+            tags[tag] = []
+        tags[tag].append(value.strip())
+
+    if stanzaType is not None:
+        yield stanzaType, tags
+
+#
+# Purpose: Returns the set of primary EMAPA ids
+#
+def queryPrimaryEmapa():
+
+    primaryEmapa = set()
     results = db.sql('''select a.accID
                 from ACC_Accession a, VOC_Term t
                 where a._MGIType_key = 13
@@ -61,48 +95,100 @@ def processUberon():
                 and t._Vocab_key = 90
                 ''', 'auto')
     for r in results:
-        primaryEmapa.append(r['accID'])
+        primaryEmapa.add(r['accID'])
 
-    idValue = 'id: '
-    uberonIdValue = 'id: UBERON:'
-    emapaXrefValue = 'xref: EMAPA:'
-    foundUberon = 0
+    return primaryEmapa
 
-    for line in uberonFile.readlines():
+#
+# Purpose: Reads the uberon.obo file and returns a dictionary of UBERON id -> [primary EMAPA ids]
+#	obsolete UBERON terms are skipped
+#	a term may have > 1 EMAPA xref
+#
+def readUberon(uberonFile, primaryEmapa):
 
-        # find [Term]
-        # find xref: EMAPA:
+    lookup = {}
 
-        if line == '[Term]':
-            foundUberon = 0
+    for stanzaType, tags in readOBOStanzas(uberonFile):
 
-        elif line[:11] == uberonIdValue:
-            uberonId = line[4:-1]
-            foundUberon = 1
+        if stanzaType != 'Term':
+            continue
 
-        elif foundUberon and line[:12] == emapaXrefValue:
+        uberonId = tags.get('id', [''])[0]
+        if not uberonId.startswith('UBERON:'):
+            continue
 
-            emapaId = line[6:-1]
+        if tags.get('is_obsolete', ['false'])[0] == 'true':
+            continue
+
+        for xref in tags.get('xref', []):
+
+            # xref: EMAPA:16894 "description"
+            emapaId = xref.split(' ')[0]
 
             # only convert to primary EMAPA
             if emapaId not in primaryEmapa:
                 continue
 
-            if uberonId not in uberonLookup:
-                uberonLookup[uberonId] = []
-            uberonLookup[uberonId].append(emapaId)
+            if uberonId not in lookup:
+                lookup[uberonId] = []
+            if emapaId not in lookup[uberonId]:
+                lookup[uberonId].append(emapaId)
 
-        else:
-            continue
+    return lookup
+
+#
+# Purpose: Reads the ${UBERONFILE} and returns a dictionary of UBERON id -> [primary EMAPA ids]
+#	also writes the UBERON ids to ${UBERONTEXTFILE}
+#
+def processUberon():
+
+    global uberonLookup
+
+    #
+    # read/store UBERON-to-EMAPA info
+    #
+
+    print('reading uberon -> emapa translation file')
+
+    uberonLookup = readUberonLookup()
+
+    writeUberonText(uberonLookup)
+
+    return uberonLookup
+
+#
+# Purpose: Reads the ${UBERONFILE} and returns a dictionary of UBERON id -> [primary EMAPA ids]
+#	does not write ${UBERONTEXTFILE} (i.e. for goload.py, which saves the lookup, see cachelib.py)
+#
+def readUberonLookup():
+
+    uberonFileName = os.environ['UBERONFILE']
+    uberonFile = open(uberonFileName, 'r')
+
+    #
+    # read/store set of primary EMAPA ids
+    #
+    primaryEmapa = queryPrimaryEmapa()
+
+    lookup = readUberon(uberonFile, primaryEmapa)
+
+    uberonFile.close()
+
+    return lookup
+
+#
+# Purpose: Writes the uberon ids that have an emapa id to ${UBERONTEXTFILE}
+#
+def writeUberonText(uberonLookup):
+
+    uberonTextFileName = os.environ['UBERONTEXTFILE']
+    uberonTextFile = open(uberonTextFileName, 'w')
 
     for u in uberonLookup:
         uberonTextFile.write(u + '\n')
 
-    uberonFile.close()
     uberonTextFile.close()
 
-    return uberonLookup
-
 #
 # Purpose: Converts extensions : UBERON: -> EMAPA
 #